@@ -0,0 +1,140 @@
+"""
+alert_wheel.py
+
+This module schedules schedule alerts on a hierarchical timing wheel instead
+of scanning every unconfirmed schedule on each poll.
+
+TimingWheel keeps several levels of slots; level 0 slots are one tick wide
+and each higher level's slots span a full rotation of the level below. An
+entry is placed in the lowest level whose current rotation contains its due
+tick and moves down a level each time the wheel reaches its slot, so insert
+and cancel are O(1) and each tick only touches the entries that are due or
+cascading. Entries further away than the top level can hold wait in an
+overflow table that is re-examined once per top-level rotation. A jump of
+more than one level 0 rotation, e.g. after the machine was suspended, re-places
+the pending entries instead of stepping through every tick in between.
+
+AlertScheduler wraps the wheel with schedule ids and ISO 8601 alert times.
+A single driver (the GUI poll timer) calls due(), which returns every alert
+that fell due since the previous call as one batch.
+"""
+
+import time
+from datetime import datetime
+
+
+class TimingWheel:
+    """Hierarchical timing wheel mapping keys to payloads that fire at a given time."""
+
+    def __init__(self, tick=1.0, slots=64, levels=4, start=None):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.spans = [slots ** level for level in range(levels + 1)]
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.ready = {}
+        self.overflow = {}
+        self.entries = {}
+        self.current = int((time.time() if start is None else start) // tick)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def schedule(self, key, when, payload):
+        """Fire payload at time when (seconds since the epoch), replacing any entry with the same key."""
+        self.cancel(key)
+        self._place(key, int(when // self.tick), payload)
+
+    def cancel(self, key):
+        """Remove the entry with the given key; return True if it was pending."""
+        bucket = self.entries.pop(key, None)
+        if bucket is None:
+            return False
+        del bucket[key]
+        return True
+
+    def clear(self):
+        """Remove every pending entry."""
+        for key in list(self.entries):
+            self.cancel(key)
+
+    def _place(self, key, due, payload):
+        if due <= self.current:
+            bucket = self.ready
+        else:
+            bucket = self.overflow
+            for level in range(self.levels):
+                if due // self.spans[level + 1] == self.current // self.spans[level + 1]:
+                    bucket = self.wheels[level][due // self.spans[level] % self.slots]
+                    break
+        bucket[key] = (due, payload)
+        self.entries[key] = bucket
+
+    def _cascade(self, bucket):
+        """Move the entries of a higher-level slot (or the overflow) down to where they now belong."""
+        moved = list(bucket.items())
+        bucket.clear()
+        for key, (due, payload) in moved:
+            self._place(key, due, payload)
+
+    def advance(self, now=None):
+        """Move the wheel forward to now and return the payloads that fell due, in due order."""
+        target = int((time.time() if now is None else now) // self.tick)
+        fired = self._drain(self.ready)
+        if target - self.current > self.slots:
+            pending = [(key, bucket.pop(key)) for key, bucket in list(self.entries.items())]
+            self.entries.clear()
+            self.current = target
+            for key, (due, payload) in pending:
+                self._place(key, due, payload)
+            return fired + self._drain(self.ready)
+        while self.current < target:
+            self.current += 1
+            if self.current % self.spans[self.levels] == 0:
+                self._cascade(self.overflow)
+            for level in range(self.levels - 1, 0, -1):
+                if self.current % self.spans[level] == 0:
+                    self._cascade(self.wheels[level][self.current // self.spans[level] % self.slots])
+            fired += self._drain(self.wheels[0][self.current % self.slots])
+            fired += self._drain(self.ready)
+        return fired
+
+    def _drain(self, bucket):
+        if not bucket:
+            return []
+        items = sorted(bucket.items(), key=lambda item: item[1][0])
+        for key, _ in items:
+            del self.entries[key]
+        bucket.clear()
+        return [payload for _, (_, payload) in items]
+
+
+class AlertScheduler:
+    """Arms one wheel entry per pending schedule alert and returns due alerts in batches."""
+
+    def __init__(self, tick=1.0):
+        self.wheel = TimingWheel(tick)
+
+    def schedule(self, sid, alert_date_time, title):
+        """Arm (or re-arm) the alert of a schedule for its ISO 8601 alert time."""
+        try:
+            when = datetime.fromisoformat(alert_date_time).timestamp()
+        except (TypeError, ValueError):
+            self.wheel.cancel(sid)
+            return
+        self.wheel.schedule(sid, when, (sid, title))
+
+    def cancel(self, sid):
+        """Disarm the alert of a schedule."""
+        self.wheel.cancel(sid)
+
+    def clear(self):
+        """Disarm every alert."""
+        self.wheel.clear()
+
+    def due(self, now=None):
+        """Return (id, title) of every alert that fell due since the previous call."""
+        return self.wheel.advance(now)
@@ -0,0 +1,534 @@
+"""
+api_server.py
+
+This module provides a local asyncio HTTP/JSON API over schedules.db so that
+scripts and integrations do not have to open the database themselves.
+
+Routes (all bodies except the calendar feed are JSON):
+    GET    /users/<uid>/schedules?q=&from=&to=&limit=   list or search schedules
+    POST   /users/<uid>/schedules                       create a schedule
+    POST   /users/<uid>/schedules/<id>/confirm          mark a schedule as confirmed
+    DELETE /users/<uid>/schedules/<id>                  delete a schedule
+    GET    /users/<uid>/alerts/stream                   server-sent events of due alerts
+    GET    /users/<uid>/calendar.ics                    iCalendar feed (ETag / If-None-Match)
+
+Reads run on a small thread pool with one connection per thread; writes go
+through the process's single writer (write_queue.py). The number of requests
+waiting for either is bounded; beyond that the server answers 503 instead of
+letting latency grow without limit.
+
+The API is meant for local clients only. Requests must name a localhost Host
+and must not carry an Origin header, which turns away browsers (including DNS
+rebinding pages), and every route requires the per-install token stored next
+to the database (schedules.db.token) in an X-Schedule-Token header. Calendar
+applications cannot send headers, so the calendar feed also accepts it as a
+?token= query parameter. POST bodies must be sent as application/json.
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from database_init import DatabaseInitializer
+from ical_feed import CalendarFeed
+from schedule_cache import SELECT_COLUMNS
+from write_queue import get_write_queue
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+IDLE_TIMEOUT = 30
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+MAX_FEEDS = 64
+ICAL_CONTENT_TYPE = "text/calendar; charset=utf-8"
+TOKEN_HEADER = "x-schedule-token"
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "[::1]"}
+
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+    401: "Unauthorized", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 415: "Unsupported Media Type", 503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    """Raised by handlers to answer with an error status and message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def load_token(db_name):
+    """Return the API token stored next to the database, creating it on first use."""
+    path = db_name + ".token"
+    try:
+        with open(path, encoding='ascii') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    token = secrets.token_urlsafe(32)
+    partial = f"{path}.{os.getpid()}.part"
+    fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='ascii') as f:
+        f.write(token)
+    try:
+        os.link(partial, path)
+    except FileExistsError:
+        # Another process created the token first; use theirs.
+        with open(path, encoding='ascii') as f:
+            token = f.read().strip()
+    finally:
+        os.remove(partial)
+    return token
+
+
+def row_to_dict(row):
+    """Convert a schedules row in SELECT_COLUMNS order to a JSON-friendly dictionary."""
+    sid, title, end, alert, conf, note, created = row
+    return {
+        'id': sid, 'title': title, 'end_date_time': end, 'alert_date_time': alert,
+        'is_confirm': bool(conf), 'note': note, 'create_time': created,
+    }
+
+
+def parse_datetime(value, field):
+    """
+    Validate an ISO 8601 date-time and return it in the format written by the GUI:
+    naive local time, so stored values keep comparing correctly as strings.
+    """
+    try:
+        value = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{field} must be an ISO 8601 date-time")
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.isoformat(timespec='seconds')
+
+
+class ScheduleStore:
+    """Schedule queries executed on a bounded thread pool."""
+
+    def __init__(self, db_name="schedules.db", workers=4, max_pending=256, feed_dir="feeds"):
+        self.db_name = db_name
+        self.feed_dir = feed_dir
+        self.feeds = OrderedDict()
+        self.feeds_lock = threading.Lock()
+        self.writer = get_write_queue(db_name)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="schedule-db")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.local = threading.local()
+
+    def connection(self):
+        """Return the calling worker thread's connection, opening it on first use."""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = DatabaseInitializer(self.db_name).open_connection()
+        return conn
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool, refusing the call when too many are already waiting."""
+        if self.pending >= self.max_pending:
+            raise HTTPError(503, "server busy")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def write(self, fn, *args):
+        """Run fn(cursor, *args) on the single writer, refusing the call when too many are already waiting."""
+        if self.pending >= self.max_pending:
+            raise HTTPError(503, "server busy")
+        self.pending += 1
+        try:
+            return await asyncio.wrap_future(self.writer.submit(lambda cursor: fn(cursor, *args)))
+        finally:
+            self.pending -= 1
+
+    def close(self):
+        """Shut down the worker pool."""
+        self.executor.shutdown(wait=True)
+
+    def list_schedules(self, uid, kw, df, dt, limit):
+        """Return schedules of a user filtered by keyword and end time range."""
+        sql = f"SELECT {SELECT_COLUMNS} FROM schedules WHERE user_id=?"
+        params = [uid]
+        if kw:
+            sql += " AND (title LIKE ? OR note LIKE ?)"
+            params += [f'%{kw}%', f'%{kw}%']
+        if df:
+            sql += " AND end_date_time >= ?"
+            params.append(df)
+        if dt:
+            sql += " AND end_date_time <= ?"
+            params.append(dt)
+        sql += " ORDER BY end_date_time LIMIT ?"
+        params.append(limit)
+        return [row_to_dict(row) for row in self.connection().execute(sql, params)]
+
+    @staticmethod
+    def create_schedule(cursor, uid, title, end, alert, note):
+        """Insert a schedule and return it (runs on the writer)."""
+        cursor.execute(
+            "INSERT INTO schedules (title, user_id, end_date_time, alert_date_time, is_confirm, note) VALUES (?,?,?,?,?,?)",
+            (title, uid, end, alert, 0, note)
+        )
+        cursor.execute(f"SELECT {SELECT_COLUMNS} FROM schedules WHERE id=?", (cursor.lastrowid,))
+        return row_to_dict(cursor.fetchone())
+
+    @staticmethod
+    def confirm_schedule(cursor, uid, sid):
+        """Mark a schedule as confirmed; return False if it does not exist (runs on the writer)."""
+        cursor.execute("UPDATE schedules SET is_confirm=1 WHERE id=? AND user_id=?", (sid, uid))
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def delete_schedule(cursor, uid, sid):
+        """Delete a schedule; return False if it does not exist (runs on the writer)."""
+        cursor.execute("DELETE FROM schedules WHERE id=? AND user_id=?", (sid, uid))
+        return cursor.rowcount > 0
+
+    def due_alerts(self, uids, since, until):
+        """Return unconfirmed schedules of the given users whose alert time falls in (since, until]."""
+        placeholder = ','.join(['?'] * len(uids))
+        rows = self.connection().execute(
+            f"SELECT user_id, {SELECT_COLUMNS} FROM schedules WHERE is_confirm=0 "
+            f"AND alert_date_time>? AND alert_date_time<=? AND user_id IN ({placeholder})",
+            [since, until] + list(uids)
+        ).fetchall()
+        due = {}
+        for row in rows:
+            due.setdefault(row[0], []).append(row_to_dict(row[1:]))
+        return due
+
+
+    def calendar(self, uid, etags):
+        """
+        Bring a user's iCalendar feed up to date and return (etag, body), with body
+        None when the current ETag is one of etags. Feeds of recently requested users
+        stay in memory, so an unchanged feed costs one change log query.
+        """
+        with self.feeds_lock:
+            entry = self.feeds.get(uid)
+            if entry is None:
+                entry = self.feeds[uid] = [threading.Lock(), None]
+            self.feeds.move_to_end(uid)
+            while len(self.feeds) > MAX_FEEDS:
+                self.feeds.popitem(last=False)
+        with entry[0]:
+            if entry[1] is None:
+                entry[1] = CalendarFeed(uid, self.feed_dir)
+            etag, _ = entry[1].build(self.connection().cursor())
+            if etag in etags or '*' in etags:
+                return etag, None
+            return etag, entry[1].read()
+
+
+class AlertHub:
+    """Polls for due alerts once per interval and fans them out to every subscribed stream."""
+
+    def __init__(self, store, interval=2.0, queue_size=100):
+        self.store = store
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscribers = {}
+        self.task = None
+
+    def subscribe(self, uid):
+        """Register a stream for a user and return the queue it will receive alerts on."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.setdefault(uid, set()).add(queue)
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.poll())
+        return queue
+
+    def unsubscribe(self, uid, queue):
+        """Remove a stream registered with subscribe()."""
+        queues = self.subscribers.get(uid)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[uid]
+
+    async def poll(self):
+        """Query due alerts for all subscribed users and deliver them until cancelled."""
+        since = datetime.now().isoformat(sep='T')
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.subscribers:
+                continue
+            until = datetime.now().isoformat(sep='T')
+            try:
+                due = await self.store.run(self.store.due_alerts, list(self.subscribers), since, until)
+            except (HTTPError, sqlite3.Error):
+                continue
+            since = until
+            for uid, alerts in due.items():
+                for queue in self.subscribers.get(uid, ()):
+                    if not queue.full():
+                        queue.put_nowait(alerts)
+
+    async def close(self):
+        """Stop polling."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+
+class ScheduleAPI:
+    """HTTP/1.1 front end dispatching requests to ScheduleStore."""
+
+    ROUTES = [
+        ('GET', re.compile(r'^/users/(\d+)/schedules$'), 'list_schedules'),
+        ('POST', re.compile(r'^/users/(\d+)/schedules$'), 'create_schedule'),
+        ('POST', re.compile(r'^/users/(\d+)/schedules/(\d+)/confirm$'), 'confirm_schedule'),
+        ('DELETE', re.compile(r'^/users/(\d+)/schedules/(\d+)$'), 'delete_schedule'),
+        ('GET', re.compile(r'^/users/(\d+)/alerts/stream$'), 'stream_alerts'),
+        ('GET', re.compile(r'^/users/(\d+)/calendar\.ics$'), 'calendar_feed'),
+    ]
+
+    def __init__(self, store, alert_interval=2.0, token=None):
+        self.store = store
+        self.token = token if token is not None else load_token(store.db_name)
+        self.alerts = AlertHub(store, alert_interval)
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 413, {'error': "request header too large"}, keep_alive=False)
+                    break
+                try:
+                    keep_alive = await self.handle_request(head, reader, writer)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def handle_request(self, head, reader, writer):
+        """Parse and dispatch one request; return True if the connection may be reused."""
+        try:
+            request_line, *header_lines = head.decode('latin-1').split('\r\n')
+            method, target, version = request_line.split(' ')
+            headers = {}
+            for line in header_lines:
+                if line:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length') or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            await self.respond(writer, 400, {'error': "malformed request"}, keep_alive=False)
+            return False
+
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if length > MAX_BODY_BYTES:
+            await self.respond(writer, 413, {'error': "request body too large"}, keep_alive=False)
+            return False
+        body = await reader.readexactly(length) if length else b''
+
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        path = unquote(url.path)
+        content_type, extra = "application/json", ()
+        try:
+            handler, args = self.route(method, path)
+            self.check_access(method, handler, headers, query)
+            if handler == 'stream_alerts':
+                await self.stream_alerts(writer, *args)
+                return False
+            if handler == 'calendar_feed':
+                status, payload, extra = await self.calendar_feed(*args, if_none_match=headers.get('if-none-match'))
+                content_type = ICAL_CONTENT_TYPE
+            else:
+                status, payload = await getattr(self, handler)(*args, query=query, body=body)
+        except HTTPError as e:
+            status, payload = e.status, {'error': e.message}
+        except sqlite3.Error as e:
+            status, payload = 503, {'error': f"database error: {e}"}
+        await self.respond(writer, status, payload, keep_alive, content_type, extra)
+        return keep_alive
+
+    def check_access(self, method, handler, headers, query):
+        """Reject requests that are not from an authorised local client."""
+        if 'origin' in headers:
+            raise HTTPError(403, "cross-origin requests are not allowed")
+        host = headers.get('host', '')
+        hostname = host[:host.find(']') + 1] if host.startswith('[') else host.rpartition(':')[0] or host
+        if hostname.lower() not in LOCAL_HOSTS:
+            raise HTTPError(403, "host not allowed")
+        token = headers.get(TOKEN_HEADER)
+        if token is None and handler == 'calendar_feed':
+            token = query.get('token')
+        if token is None or not hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8')):
+            raise HTTPError(401, "missing or invalid token")
+        if method == 'POST':
+            media_type = headers.get('content-type', '').partition(';')[0].strip().lower()
+            if media_type != 'application/json':
+                raise HTTPError(415, "body must be sent as application/json")
+
+    def route(self, method, path):
+        """Return the handler name and integer path arguments for a request."""
+        allowed = False
+        for route_method, pattern, handler in self.ROUTES:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return handler, [int(g) for g in match.groups()]
+                allowed = True
+        if allowed:
+            raise HTTPError(405, "method not allowed")
+        raise HTTPError(404, "not found")
+
+    async def respond(self, writer, status, payload, keep_alive=True, content_type="application/json", headers=()):
+        """Write a complete response; payload is sent as is if it is bytes and encoded as JSON otherwise."""
+        if isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        lines = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            *headers,
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status != 204:
+            lines.append(f"Content-Length: {len(body)}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    @staticmethod
+    def parse_json(body):
+        """Decode a JSON object request body."""
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "body must be valid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return data
+
+    async def list_schedules(self, uid, query, body):
+        """List or search a user's schedules."""
+        df = parse_datetime(query['from'], 'from') if 'from' in query else None
+        dt = parse_datetime(query['to'], 'to') if 'to' in query else None
+        try:
+            limit = min(int(query.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+        rows = await self.store.run(self.store.list_schedules, uid, query.get('q', ''), df, dt, limit)
+        return 200, rows
+
+    async def create_schedule(self, uid, query, body):
+        """Create a schedule from a JSON body with title, end_date_time, alert_date_time and note."""
+        data = self.parse_json(body)
+        end = parse_datetime(data.get('end_date_time'), 'end_date_time')
+        alert = parse_datetime(data.get('alert_date_time'), 'alert_date_time')
+        if alert > end:
+            raise HTTPError(400, "alert_date_time cannot be after end_date_time")
+        title = str(data.get('title', '')).strip()
+        note = str(data.get('note', '')).strip()
+        row = await self.store.write(self.store.create_schedule, uid, title, end, alert, note)
+        return 201, row
+
+    async def confirm_schedule(self, uid, sid, query, body):
+        """Mark a schedule as confirmed."""
+        if not await self.store.write(self.store.confirm_schedule, uid, sid):
+            raise HTTPError(404, "schedule not found")
+        return 200, {'id': sid, 'is_confirm': True}
+
+    async def delete_schedule(self, uid, sid, query, body):
+        """Delete a schedule."""
+        if not await self.store.write(self.store.delete_schedule, uid, sid):
+            raise HTTPError(404, "schedule not found")
+        return 204, None
+
+    async def stream_alerts(self, writer, uid):
+        """Stream due alerts of a user as server-sent events until the client disconnects."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+        queue = self.alerts.subscribe(uid)
+        try:
+            while True:
+                try:
+                    alerts = await asyncio.wait_for(queue.get(), 15)
+                    writer.write(f"event: alert\ndata: {json.dumps(alerts)}\n\n".encode('utf-8'))
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.alerts.unsubscribe(uid, queue)
+
+    async def calendar_feed(self, uid, if_none_match=None):
+        """Serve a user's iCalendar feed, answering 304 when the client's copy is current."""
+        etags = {tag.strip().removeprefix('W/') for tag in (if_none_match or '').split(',') if tag.strip()}
+        etag, body = await self.store.run(self.store.calendar, uid, etags)
+        headers = (f"ETag: {etag}", "Cache-Control: no-cache")
+        if body is None:
+            return 304, None, headers
+        return 200, body, headers
+
+    async def close(self):
+        """Stop background tasks and the worker pool."""
+        await self.alerts.close()
+        self.store.close()
+
+
+async def serve(host, port, db_name, workers):
+    """Create the schema if needed and serve the API until cancelled."""
+    db_initializer = DatabaseInitializer(db_name)
+    db_initializer.create_tables()
+    db_initializer.close_connection()
+
+    api = ScheduleAPI(ScheduleStore(db_name, workers))
+    server = await asyncio.start_server(api.handle_connection, host, port, limit=MAX_HEADER_BYTES, backlog=1024)
+    print(f"Serving schedules API on http://{host}:{port} (token in {db_name}.token)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await api.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON API over schedules.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default="schedules.db")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,68 @@
+"""
+change_sync.py
+
+This module lets several clients that share one schedules.db stay in sync by
+reading the schedule_changes log instead of re-reading the schedules table.
+
+Triggers created by DatabaseInitializer append one row per insert, update or
+delete with a monotonically increasing sequence number. A ChangeFeed
+remembers the last sequence it has seen and pulls only newer entries, so
+keeping up costs O(changes) rather than O(table).
+"""
+
+from collections import namedtuple
+
+Change = namedtuple('Change', ['schedule_id', 'user_id', 'op'])
+
+
+class ChangeFeed:
+    """Reads schedule changes committed after a given sequence number."""
+
+    def __init__(self, cursor, last_seq=None, batch_size=5000):
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.last_seq = self.latest_seq() if last_seq is None else last_seq
+
+    def latest_seq(self):
+        """Return the highest sequence number ever assigned, including pruned entries."""
+        self.cursor.execute("SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name='schedule_changes'), 0)")
+        return self.cursor.fetchone()[0]
+
+    def is_stale(self):
+        """Return True if entries newer than last_seq have been pruned, so deltas can no longer be trusted."""
+        self.cursor.execute("SELECT MIN(seq) FROM schedule_changes")
+        oldest = self.cursor.fetchone()[0]
+        if oldest is None:
+            return self.latest_seq() > self.last_seq
+        return oldest > self.last_seq + 1
+
+    def pull(self):
+        """
+        Return the changes committed since the last pull, one per schedule, or None
+        if the log no longer covers that range and the caller must reload everything.
+        """
+        if self.is_stale():
+            self.last_seq = self.latest_seq()
+            return None
+        changes = {}
+        while True:
+            self.cursor.execute(
+                "SELECT seq, schedule_id, user_id, op FROM schedule_changes WHERE seq>? ORDER BY seq LIMIT ?",
+                (self.last_seq, self.batch_size)
+            )
+            rows = self.cursor.fetchall()
+            for seq, sid, uid, op in rows:
+                changes.pop((sid, uid), None)
+                changes[(sid, uid)] = Change(sid, uid, op)
+            if rows:
+                self.last_seq = rows[-1][0]
+            if len(rows) < self.batch_size:
+                return list(changes.values())
+
+
+def prune_changes(cursor, keep_days=7):
+    """Delete change log entries older than keep_days and return how many were removed."""
+    cursor.execute(
+        "DELETE FROM schedule_changes WHERE changed_at < datetime('now', ?)", (f'-{int(keep_days)} days',)
+    )
+    return cursor.rowcount
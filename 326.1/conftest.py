@@ -0,0 +1,25 @@
+import pytest
+
+from database_init import DatabaseInitializer
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh schedules database with every table and trigger created."""
+    initializer = DatabaseInitializer(str(tmp_path / "schedules.db"))
+    initializer.create_tables()
+    yield initializer
+    initializer.close_connection()
+
+
+@pytest.fixture
+def add_schedule(db):
+    """Insert and commit a schedule through the fixture connection and return its id."""
+    def add(uid, end="2026-10-01T10:00:00", title="t", confirmed=0, alert=None, note=""):
+        cursor = db.connection.execute(
+            "INSERT INTO schedules (title, user_id, end_date_time, alert_date_time, is_confirm, note) "
+            "VALUES (?,?,?,?,?,?)", (title, uid, end, alert or end, confirmed, note)
+        )
+        db.connection.commit()
+        return cursor.lastrowid
+    return add
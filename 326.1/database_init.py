@@ -1,26 +1,76 @@
+import os
 import sqlite3
 
+# Page cache and memory-mapping settings applied to every connection.
+# cache_size is negative to give the size in KiB rather than pages.
+PROFILES = {
+    'low_memory': {'cache_size': -2000, 'mmap_size': 0},
+    'default': {'cache_size': -16000, 'mmap_size': 64 * 1024 * 1024},
+    'performance': {'cache_size': -64000, 'mmap_size': 512 * 1024 * 1024},
+}
+
+# Seconds a connection waits for a lock held by another connection before failing.
+BUSY_TIMEOUT = 10
+
+# Journal modes accepted in SCHEDULE_DB_JOURNAL. WAL (the default) lets readers
+# run while the single writer (write_queue.py) commits, but it relies on shared
+# memory between every process using the database, so it does not work when
+# schedules.db lives on a network file system, e.g. two machines sharing a
+# drive. Use SCHEDULE_DB_JOURNAL=DELETE there; readers then wait for commits.
+JOURNAL_MODES = ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST')
+
+
+def journal_mode():
+    """Return the journal mode selected by SCHEDULE_DB_JOURNAL, WAL by default."""
+    mode = os.environ.get('SCHEDULE_DB_JOURNAL', 'WAL').upper()
+    if mode not in JOURNAL_MODES:
+        raise ValueError(f"Unknown journal mode: {mode}")
+    return mode
+
+
+def profile_name():
+    """Return the PROFILES entry selected by SCHEDULE_DB_PROFILE, 'default' if unset."""
+    return os.environ.get('SCHEDULE_DB_PROFILE', 'default')
+
 
 class DatabaseInitializer:
     """Handles SQLite database connection and table creation."""
 
-    def __init__(self, db_name="schedules.db"):
+    def __init__(self, db_name="schedules.db", profile="default"):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown database profile: {profile}")
         self.db_name = db_name
+        self.profile = profile
         self.connection = None
 
     def connect(self):
         """Establish a connection to the SQLite database and return a cursor."""
-        self.connection = sqlite3.connect(self.db_name)
+        self.connection = self.open_connection()
         return self.connection.cursor()
 
+    def open_connection(self):
+        """Open a new connection with the settings of the selected profile applied."""
+        connection = sqlite3.connect(self.db_name, timeout=BUSY_TIMEOUT)
+        for pragma, value in PROFILES[self.profile].items():
+            connection.execute(f"PRAGMA {pragma}={int(value)}")
+        return connection
+
     def create_tables(self):
         """
         Create the required tables if they do not already exist:
         - user: stores user credentials and metadata.
         - schedules: stores user schedule information.
+        - schedule_changes: change log of schedules maintained by triggers.
+        - schedule_daily_counts / schedule_user_counts: per-day and per-user
+          confirmed/unconfirmed counters maintained by triggers.
         """
         cursor = self.connect()
 
+        # Only takes effect on a new, empty database; see MaintenanceService.convert
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # Persistent; see JOURNAL_MODES for when WAL cannot be used
+        cursor.execute(f"PRAGMA journal_mode={journal_mode()}")
+
         # Create the user table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS user (
@@ -45,8 +95,115 @@ class DatabaseInitializer:
             );
         ''')
 
+        # Index the per-user date range lookups used by the table and timeline
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_schedules_user_end ON schedules (user_id, end_date_time);
+        ''')
+
+        # Create the change log read by clients to pull deltas (see change_sync.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schedule_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                schedule_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS schedules_log_insert AFTER INSERT ON schedules
+            BEGIN
+                INSERT INTO schedule_changes (schedule_id, user_id, op) VALUES (NEW.id, NEW.user_id, 'insert');
+            END;
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS schedules_log_update AFTER UPDATE ON schedules
+            BEGIN
+                INSERT INTO schedule_changes (schedule_id, user_id, op)
+                    SELECT OLD.id, OLD.user_id, 'delete' WHERE OLD.user_id <> NEW.user_id OR OLD.id <> NEW.id;
+                INSERT INTO schedule_changes (schedule_id, user_id, op) VALUES (NEW.id, NEW.user_id, 'update');
+            END;
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS schedules_log_delete AFTER DELETE ON schedules
+            BEGIN
+                INSERT INTO schedule_changes (schedule_id, user_id, op) VALUES (OLD.id, OLD.user_id, 'delete');
+            END;
+        ''')
+
+        self.create_counters(cursor)
+
         self.connection.commit()
 
+    def create_counters(self, cursor):
+        """
+        Create the summary counter tables and their triggers. Counters are backfilled
+        from schedules in the same transaction when the tables are first created.
+        """
+        # Decide on the backfill under the write lock, so that of several processes
+        # starting at once only the one that creates the tables fills them.
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='schedule_daily_counts'")
+        backfill = cursor.fetchone() is None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schedule_daily_counts (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                unconfirmed INTEGER NOT NULL DEFAULT 0,
+                confirmed INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            ) WITHOUT ROWID;
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schedule_user_counts (
+                user_id INTEGER PRIMARY KEY,
+                unconfirmed INTEGER NOT NULL DEFAULT 0,
+                confirmed INTEGER NOT NULL DEFAULT 0
+            );
+        ''')
+
+        if backfill:
+            cursor.execute('''
+                INSERT INTO schedule_daily_counts (user_id, day, unconfirmed, confirmed)
+                SELECT user_id, substr(end_date_time, 1, 10),
+                       SUM(CASE WHEN is_confirm THEN 0 ELSE 1 END), SUM(CASE WHEN is_confirm THEN 1 ELSE 0 END)
+                FROM schedules GROUP BY 1, 2;
+            ''')
+            cursor.execute('''
+                INSERT INTO schedule_user_counts (user_id, unconfirmed, confirmed)
+                SELECT user_id, SUM(CASE WHEN is_confirm THEN 0 ELSE 1 END), SUM(CASE WHEN is_confirm THEN 1 ELSE 0 END)
+                FROM schedules GROUP BY 1;
+            ''')
+
+        # Statements adding (sign=+1) or removing (sign=-1) one row's contribution
+        def apply(row, sign):
+            unconfirmed = f"{sign} * (CASE WHEN {row}.is_confirm THEN 0 ELSE 1 END)"
+            confirmed = f"{sign} * (CASE WHEN {row}.is_confirm THEN 1 ELSE 0 END)"
+            day = f"substr({row}.end_date_time, 1, 10)"
+            return f'''
+                INSERT OR IGNORE INTO schedule_daily_counts (user_id, day) VALUES ({row}.user_id, {day});
+                UPDATE schedule_daily_counts SET unconfirmed = unconfirmed + {unconfirmed}, confirmed = confirmed + {confirmed}
+                    WHERE user_id = {row}.user_id AND day = {day};
+                INSERT OR IGNORE INTO schedule_user_counts (user_id) VALUES ({row}.user_id);
+                UPDATE schedule_user_counts SET unconfirmed = unconfirmed + {unconfirmed}, confirmed = confirmed + {confirmed}
+                    WHERE user_id = {row}.user_id;
+            '''
+
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS schedules_count_insert AFTER INSERT ON schedules
+            BEGIN {apply('NEW', 1)} END;
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS schedules_count_update
+            AFTER UPDATE OF user_id, end_date_time, is_confirm ON schedules
+            BEGIN {apply('OLD', -1)} {apply('NEW', 1)} END;
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS schedules_count_delete AFTER DELETE ON schedules
+            BEGIN {apply('OLD', -1)} END;
+        ''')
+
     def get_connection_and_cursor(self):
         """
         Get the active database connection and cursor.
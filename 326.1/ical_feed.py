@@ -0,0 +1,211 @@
+"""
+ical_feed.py
+
+This module publishes each user's schedules as an iCalendar (.ics) feed that
+phone and desktop calendars can subscribe to.
+
+A CalendarFeed keeps the rendered VEVENT of every schedule of one user. A
+JSON sidecar next to the feed records the schedule_changes sequence number
+the feed was built at and where each schedule's VEVENT sits in the file, so
+a new process can pick the events up again without rendering them. A
+rebuild pulls the change log from that point and re-renders only the
+schedules of the user that were inserted, updated or deleted since;
+everything else is reused as bytes. When the log has been pruned past that
+point (or there is no usable sidecar) the feed is rendered from scratch.
+The feed and the sidecar are replaced atomically, and the ETag is a hash of
+the feed body, so it only changes when the content does.
+
+    python ical_feed.py --db schedules.db --uid 1 --out feeds
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from change_sync import ChangeFeed
+from database_init import DatabaseInitializer
+from schedule_cache import SELECT_COLUMNS
+
+PRODID = "-//Group-46//Schedule App//EN"
+CHUNK_SIZE = 500
+
+
+def escape_text(value):
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)."""
+    value = str(value or '')
+    for raw, escaped in (('\\', '\\\\'), (';', '\\;'), (',', '\\,'), ('\r\n', '\\n'), ('\n', '\\n')):
+        value = value.replace(raw, escaped)
+    return value
+
+
+def fold(line):
+    """Fold a content line into chunks of at most 75 octets, continuation lines starting with a space."""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts = []
+    limit = 75
+    while len(data) > limit:
+        cut = limit
+        while cut > 0 and (data[cut] & 0xC0) == 0x80:  # do not split a UTF-8 sequence
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+        limit = 74
+    parts.append(data.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_datetime(value, utc=False):
+    """Convert a stored date-time to the iCalendar DATE-TIME form, or None if it cannot be parsed."""
+    try:
+        dt = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return dt.strftime('%Y%m%dT%H%M%S') + ('Z' if utc else '')
+
+
+def render_event(row, uid, stamp):
+    """Render one schedules row in SELECT_COLUMNS order as an encoded VEVENT."""
+    sid, title, end, alert, conf, note, created = row
+    start = format_datetime(end)
+    if start is None:
+        return b''
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:schedule-{sid}-{uid}@group-46",
+        f"DTSTAMP:{stamp}",
+        f"LAST-MODIFIED:{stamp}",
+        f"DTSTART:{start}",
+        f"SUMMARY:{escape_text(title)}",
+        f"STATUS:{'CONFIRMED' if conf else 'TENTATIVE'}",
+    ]
+    # create_time is filled by SQLite's CURRENT_TIMESTAMP, which is UTC
+    created = format_datetime(created, utc=True) if created else None
+    if created:
+        lines.append(f"CREATED:{created}")
+    if note:
+        lines.append(f"DESCRIPTION:{escape_text(note)}")
+    trigger = format_datetime(alert)
+    if trigger and not conf:
+        lines += ["BEGIN:VALARM", "ACTION:DISPLAY", f"DESCRIPTION:{escape_text(title)}",
+                  f"TRIGGER;VALUE=DATE-TIME:{trigger}", "END:VALARM"]
+    lines.append("END:VEVENT")
+    return ''.join(fold(line) for line in lines).encode('utf-8')
+
+
+def write_atomic(path, data):
+    """Replace a file with data so that readers see either the old or the new content."""
+    tmp = f"{path}.{os.getpid()}.part"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class CalendarFeed:
+    """The .ics feed of one user, rebuilt incrementally from the schedule change log."""
+
+    def __init__(self, uid, out_dir="feeds"):
+        self.uid = uid
+        self.path = os.path.join(out_dir, f"{uid}.ics")
+        self.state_path = os.path.join(out_dir, f"{uid}.json")
+        self.seq = None
+        self.events = {}
+        self.etag = None
+        self.load_state()
+
+    def head(self):
+        """Return the encoded lines preceding the events."""
+        lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN",
+                 f"X-WR-CALNAME:Schedules of user {self.uid}"]
+        return ''.join(fold(line) for line in lines).encode('utf-8')
+
+    def load_state(self):
+        """Recover the events of a previous build from the feed and its sidecar; otherwise the next build is full."""
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+            body = self.read()
+            if f'"{hashlib.sha1(body).hexdigest()}"' != state['etag']:
+                return
+            events = {}
+            offset = len(self.head())
+            for sid, size in zip(state['ids'], state['sizes']):
+                events[sid] = body[offset:offset + size]
+                offset += size
+            self.seq, self.etag, self.events = state['seq'], state['etag'], events
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def build(self, cursor):
+        """
+        Bring the feed up to date and return (etag, rendered) where rendered is the
+        number of events re-rendered; (etag, 0) means the file was left untouched.
+        """
+        feed = ChangeFeed(cursor, self.seq)
+        changes = None if self.seq is None else feed.pull()
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        if changes is None:
+            cursor.execute(f"SELECT {SELECT_COLUMNS} FROM schedules WHERE user_id=? ORDER BY id", (self.uid,))
+            self.events = {row[0]: render_event(row, self.uid, stamp) for row in cursor.fetchall()}
+            rendered = len(self.events)
+        else:
+            changed = list({change.schedule_id for change in changes if change.user_id == self.uid})
+            for sid in changed:
+                self.events.pop(sid, None)
+            for i in range(0, len(changed), CHUNK_SIZE):
+                chunk = changed[i:i + CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT {SELECT_COLUMNS} FROM schedules WHERE user_id=? "
+                    f"AND id IN ({','.join(['?'] * len(chunk))})", [self.uid] + chunk
+                )
+                for row in cursor.fetchall():
+                    self.events[row[0]] = render_event(row, self.uid, stamp)
+            rendered = len(changed)
+        advanced = feed.last_seq != self.seq
+        self.seq = feed.last_seq
+        if rendered or self.etag is None:
+            body = self.render()
+            self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            write_atomic(self.path, body)
+        if rendered or advanced:
+            self.save_state()
+        return self.etag, rendered
+
+    def render(self):
+        """Return the complete feed as bytes."""
+        return b''.join([self.head(), *self.events.values(), b"END:VCALENDAR\r\n"])
+
+    def save_state(self):
+        """Write the sidecar used by the next build."""
+        state = {'seq': self.seq, 'etag': self.etag, 'ids': list(self.events),
+                 'sizes': [len(event) for event in self.events.values()]}
+        write_atomic(self.state_path, json.dumps(state).encode('utf-8'))
+
+    def read(self):
+        """Return the bytes of the feed file."""
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh a user's iCalendar feed")
+    parser.add_argument("--db", default="schedules.db")
+    parser.add_argument("--uid", type=int, required=True)
+    parser.add_argument("--out", default="feeds")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"{args.db} does not exist")
+    conn = DatabaseInitializer(args.db).open_connection()
+    start = time.perf_counter()
+    calendar = CalendarFeed(args.uid, args.out)
+    etag, rendered = calendar.build(conn.cursor())
+    conn.close()
+    print(f"{calendar.path}: {len(calendar.events)} events, {rendered} re-rendered, ETag {etag} "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,291 @@
+"""
+instrumentation.py
+
+This module provides lightweight timing instrumentation for the schedule
+manager. It records latency histograms and row counts for SQL statements and
+UI refresh paths, captures the query plan of slow statements, and exports the
+collected data to a local JSON or Prometheus text file.
+
+Instrumentation is off unless the SCHEDULE_METRICS environment variable is
+set (or it is switched on from the diagnostics panel). While disabled, every
+entry point returns after a single attribute check.
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+# Upper bounds (seconds) of the latency histogram buckets.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_PLACEHOLDER_LIST = re.compile(r'\?(\s*,\s*\?)+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and variable-length placeholder lists so a statement maps to one metric."""
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    return _PLACEHOLDER_LIST.sub('?, ...', sql)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with row count totals."""
+
+    __slots__ = ('counts', 'count', 'total', 'max', 'rows')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def observe(self, seconds, rows=None):
+        """Add one observation to the histogram."""
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if rows:
+            self.rows += rows
+
+    def quantile(self, q):
+        """Return the upper bound of the bucket containing the q-th quantile."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return self.max
+
+    def to_dict(self):
+        """Return the histogram as a plain dictionary."""
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'max': self.max,
+            'rows': self.rows,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': dict(zip([str(b) for b in BUCKETS] + ['+Inf'], self.counts)),
+        }
+
+
+class _NullTimer:
+    """Context manager used when instrumentation is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """Context manager that records its elapsed time into an Instrumentation instance."""
+
+    __slots__ = ('metrics', 'name', 'rows', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.rows = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+class Instrumentation:
+    """Collects latency histograms, row counts and slow query plans."""
+
+    def __init__(self, enabled=False, slow_query_seconds=0.05, slow_query_limit=50):
+        self.enabled = enabled
+        self.slow_query_seconds = slow_query_seconds
+        self.histograms = {}
+        self.slow_queries = deque(maxlen=slow_query_limit)
+        self.lock = threading.Lock()
+
+    def timed(self, name):
+        """Return a context manager timing the enclosed block under the given name."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name, seconds, rows=None):
+        """Record one observation for the named metric."""
+        with self.lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(seconds, rows)
+
+    def record_slow_query(self, connection, sql, params, seconds):
+        """Store a slow statement together with its EXPLAIN QUERY PLAN output."""
+        try:
+            plan = [row[-1] for row in connection.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        except Exception as e:
+            plan = [f"unavailable: {e}"]
+        with self.lock:
+            self.slow_queries.append({
+                'sql': normalize_sql(sql),
+                'seconds': seconds,
+                'plan': plan,
+                'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            })
+
+    def wrap_cursor(self, cursor):
+        """Return a cursor proxy whose statements are timed by this instance."""
+        return InstrumentedCursor(cursor, self)
+
+    def reset(self):
+        """Discard all collected data."""
+        with self.lock:
+            self.histograms.clear()
+            self.slow_queries.clear()
+
+    def snapshot(self):
+        """Return a point-in-time copy of all collected data."""
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'metrics': {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+                'slow_queries': list(self.slow_queries),
+            }
+
+    def export_json(self, path):
+        """Write a JSON snapshot of the collected data to path."""
+        _write_atomic(path, json.dumps(self.snapshot(), indent=2))
+
+    def export_prometheus(self, path):
+        """Write the collected histograms to path in the Prometheus text format."""
+        lines = [
+            '# HELP schedule_latency_seconds Latency of instrumented operations.',
+            '# TYPE schedule_latency_seconds histogram',
+        ]
+        rows = [
+            '# HELP schedule_rows_total Rows returned by instrumented operations.',
+            '# TYPE schedule_rows_total counter',
+        ]
+        for name, data in self.snapshot()['metrics'].items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, n in data['buckets'].items():
+                cumulative += n
+                lines.append(f'schedule_latency_seconds_bucket{{op="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'schedule_latency_seconds_sum{{op="{label}"}} {data["sum"]}')
+            lines.append(f'schedule_latency_seconds_count{{op="{label}"}} {data["count"]}')
+            rows.append(f'schedule_rows_total{{op="{label}"}} {data["rows"]}')
+        _write_atomic(path, '\n'.join(lines + rows) + '\n')
+
+    def export(self, path):
+        """Export to path, choosing the Prometheus format for .prom files and JSON otherwise."""
+        if path.endswith('.prom'):
+            self.export_prometheus(path)
+        else:
+            self.export_json(path)
+
+
+class InstrumentedCursor:
+    """
+    Proxy around an sqlite3 cursor that times execute() and counts fetched rows.
+    sqlite3 steps a query while its rows are fetched, so a statement is compared
+    with slow_query_seconds on its execute plus fetch time once its rows are
+    exhausted, or when the next statement replaces it.
+    """
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._name = None
+        self._statement = None
+        self._elapsed = 0.0
+
+    def execute(self, sql, params=()):
+        """Execute a statement, timing it when instrumentation is enabled."""
+        metrics = self._metrics
+        self._finish()
+        if not metrics.enabled:
+            self._name = None
+            self._cursor.execute(sql, params)
+            return self
+        start = time.perf_counter()
+        self._cursor.execute(sql, params)
+        elapsed = time.perf_counter() - start
+        self._name = 'sql: ' + normalize_sql(sql)
+        metrics.record(self._name, elapsed)
+        self._statement = (sql, params)
+        self._elapsed = elapsed
+        if self._cursor.description is None:
+            self._finish()
+        return self
+
+    def _finish(self):
+        """Log the current statement as slow if its execute and fetch time reached the threshold."""
+        if self._statement is not None and self._elapsed >= self._metrics.slow_query_seconds:
+            sql, params = self._statement
+            self._metrics.record_slow_query(self._cursor.connection, sql, params, self._elapsed)
+        self._statement = None
+
+    def _fetched(self, start, rows, exhausted):
+        if self._name is not None:
+            elapsed = time.perf_counter() - start
+            self._metrics.record(self._name + ' [fetch]', elapsed, rows)
+            self._elapsed += elapsed
+        if exhausted:
+            self._finish()
+
+    def fetchall(self):
+        """Fetch all remaining rows, recording the fetch time and row count."""
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def fetchmany(self, size=None):
+        """Fetch the next batch of rows, recording the fetch time and row count."""
+        start = time.perf_counter()
+        size = size if size is not None else self._cursor.arraysize
+        rows = self._cursor.fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchone(self):
+        """Fetch the next row, recording the fetch time."""
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, 1 if row is not None else 0, row is None)
+        return row
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _write_atomic(path, text):
+    """Write text to path through a temporary file so readers never see a partial export."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# Process-wide instance shared by the GUI, its worker threads and helper modules.
+metrics = Instrumentation(enabled=bool(os.environ.get('SCHEDULE_METRICS')))
@@ -1,19 +1,21 @@
 import hashlib
 import re
 import sys
-import sqlite3
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton,
     QFormLayout, QHBoxLayout, QMessageBox, QDialog, QCheckBox
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QIcon
+from PyQt5.QtGui import QIcon
+from database_init import DatabaseInitializer, profile_name
 from main_gui import ScheduleApp
+from style import theme_manager
+from write_queue import get_write_queue
 
 
 def get_db_connection():
     """Establishes a connection to the local SQLite database."""
-    return sqlite3.connect("schedules.db")
+    return DatabaseInitializer("schedules.db", profile_name()).open_connection()
 
 
 class LoginWindow(QWidget):
@@ -21,23 +23,21 @@ class LoginWindow(QWidget):
 
     def __init__(self):
         super().__init__()
+        self.setObjectName("loginWindow")
         self.setWindowTitle('Schedule Manager')
         self.setFixedSize(400, 300)
         self.init_ui()
 
     def init_ui(self):
         """Initializes the UI components of the login window."""
-        self.setStyleSheet("background-color: #ecf0f1;")
-
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(40, 30, 40, 30)
         main_layout.setSpacing(20)
 
         # Title label
         title_label = QLabel("User Login")
+        title_label.setObjectName("loginTitle")
         title_label.setAlignment(Qt.AlignCenter)
-        title_label.setFont(QFont("Segoe UI", 18, QFont.Bold))
-        title_label.setStyleSheet("color: #2c3e50;")
         main_layout.addWidget(title_label)
 
         # Form layout for inputs
@@ -45,28 +45,14 @@ class LoginWindow(QWidget):
         form_layout.setLabelAlignment(Qt.AlignRight)
         form_layout.setVerticalSpacing(15)
 
-        input_style = """
-            QLineEdit {
-                border: 2px solid #bdc3c7;
-                border-radius: 5px;
-                padding: 5px 10px;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border-color: #3498db;
-            }
-        """
-
         self.username_input = QLineEdit()
         self.username_input.setPlaceholderText("Enter your email")
         self.username_input.setFixedHeight(35)
-        self.username_input.setStyleSheet(input_style)
 
         self.password_input = QLineEdit()
         self.password_input.setPlaceholderText("Enter your password")
         self.password_input.setEchoMode(QLineEdit.Password)
         self.password_input.setFixedHeight(35)
-        self.password_input.setStyleSheet(input_style)
 
         form_layout.addRow("Email:", self.username_input)
         form_layout.addRow("Password:", self.password_input)
@@ -74,7 +60,7 @@ class LoginWindow(QWidget):
 
         # Dark mode toggle
         self.dark_mode_checkbox = QCheckBox("Enable dark mode")
-        self.dark_mode_checkbox.setStyleSheet("font-size: 13px;")
+        self.dark_mode_checkbox.toggled.connect(theme_manager.apply)
         main_layout.addWidget(self.dark_mode_checkbox)
 
         # Buttons layout
@@ -83,34 +69,12 @@ class LoginWindow(QWidget):
 
         login_btn = QPushButton("Login")
         login_btn.setFixedHeight(35)
-        login_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3498db;
-                color: white;
-                border: none;
-                border-radius: 5px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-        """)
+        login_btn.setObjectName("loginButton")
         login_btn.clicked.connect(self.login)
 
         register_btn = QPushButton("Register")
         register_btn.setFixedHeight(35)
-        register_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2ecc71;
-                color: white;
-                border: none;
-                border-radius: 5px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #27ae60;
-            }
-        """)
+        register_btn.setObjectName("registerButton")
         register_btn.clicked.connect(self.open_register)
 
         button_layout.addWidget(login_btn)
@@ -164,10 +128,10 @@ class RegisterDialog(QDialog):
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.setObjectName("registerDialog")
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
         self.setWindowTitle("Register New User")
         self.setFixedSize(400, 300)
-        self.setStyleSheet("background-color: #ecf0f1;")
         self.init_ui()
 
     def init_ui(self):
@@ -177,43 +141,27 @@ class RegisterDialog(QDialog):
         layout.setSpacing(20)
 
         title_label = QLabel("Create Account")
-        title_label.setFont(QFont("Segoe UI", 16, QFont.Bold))
+        title_label.setObjectName("registerTitle")
         title_label.setAlignment(Qt.AlignCenter)
-        title_label.setStyleSheet("color: #2c3e50;")
         layout.addWidget(title_label)
 
         form_layout = QFormLayout()
         form_layout.setLabelAlignment(Qt.AlignRight)
         form_layout.setVerticalSpacing(15)
 
-        input_style = """
-            QLineEdit {
-                border: 2px solid #bdc3c7;
-                border-radius: 5px;
-                padding: 5px 10px;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border-color: #3498db;
-            }
-        """
-
         self.email_input = QLineEdit()
         self.email_input.setPlaceholderText("Email address")
         self.email_input.setFixedHeight(35)
-        self.email_input.setStyleSheet(input_style)
 
         self.password_input = QLineEdit()
         self.password_input.setPlaceholderText("Password")
         self.password_input.setEchoMode(QLineEdit.Password)
         self.password_input.setFixedHeight(35)
-        self.password_input.setStyleSheet(input_style)
 
         self.confirm_input = QLineEdit()
         self.confirm_input.setPlaceholderText("Confirm password")
         self.confirm_input.setEchoMode(QLineEdit.Password)
         self.confirm_input.setFixedHeight(35)
-        self.confirm_input.setStyleSheet(input_style)
 
         form_layout.addRow("Email:", self.email_input)
         form_layout.addRow("Password:", self.password_input)
@@ -222,18 +170,7 @@ class RegisterDialog(QDialog):
 
         register_btn = QPushButton("Register")
         register_btn.setFixedHeight(35)
-        register_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2ecc71;
-                color: white;
-                border: none;
-                border-radius: 5px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #27ae60;
-            }
-        """)
+        register_btn.setObjectName("registerButton")
         register_btn.clicked.connect(self.register)
         layout.addWidget(register_btn)
 
@@ -271,23 +208,25 @@ class RegisterDialog(QDialog):
             QMessageBox.warning(self, "Mismatch", "Passwords do not match.")
             return
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM user WHERE email=?", (email,))
-        if cursor.fetchone():
+        password_hash = self.hash_password(pwd)
+
+        def insert_user(cursor):
+            cursor.execute("SELECT id FROM user WHERE email=?", (email,))
+            if cursor.fetchone():
+                return False
+            cursor.execute("INSERT INTO user (email, password_hash) VALUES (?, ?)", (email, password_hash))
+            return True
+
+        if not get_write_queue("schedules.db", profile_name()).submit(insert_user).result():
             QMessageBox.warning(self, "Registration Failed", "Email already registered.")
-            conn.close()
             return
-
-        cursor.execute("INSERT INTO user (email, password_hash) VALUES (?, ?)", (email, self.hash_password(pwd)))
-        conn.commit()
-        conn.close()
         self.accept()
 
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     app.setWindowIcon(QIcon("icon.png"))
+    theme_manager.apply(dark=False)
     login_window = LoginWindow()
     login_window.show()
     sys.exit(app.exec_())
@@ -1,16 +1,26 @@
+import os
 import queue
 import sys
-import sqlite3
-from datetime import datetime
+from datetime import date, datetime
 import pyttsx3
-from PyQt5.QtCore import QDateTime, Qt, QTimer, QThread, pyqtSignal
-from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import QDateTime, QTime, Qt, QTimer, QThread, pyqtSignal
+from PyQt5.QtGui import QIcon, QKeySequence
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
     QHBoxLayout, QLineEdit, QDialog, QDialogButtonBox, QLabel, QComboBox,
-    QDateTimeEdit, QFileDialog, QMessageBox, QAbstractItemView, QSystemTrayIcon
+    QDateTimeEdit, QFileDialog, QMessageBox, QAbstractItemView, QSystemTrayIcon,
+    QCheckBox, QPlainTextEdit, QShortcut, QStackedWidget
 )
-from style import get_dark_theme, get_light_theme
+from alert_wheel import AlertScheduler
+from change_sync import ChangeFeed
+from database_init import DatabaseInitializer, profile_name
+from instrumentation import metrics
+from maintenance import MaintenanceService
+from schedule_cache import ScheduleCache
+from summary import load_summary
+from timeline_view import TimelineView
+from write_queue import get_write_queue
+from style import theme_manager
 
 
 class TTSThread(QThread):
@@ -40,8 +50,9 @@ class TTSThread(QThread):
             if self.interrupt:
                 self.queue.task_done()
                 continue
-            self.engine.say(message)
-            self.engine.runAndWait()
+            with metrics.timed("tts.synthesis"):
+                self.engine.say(message)
+                self.engine.runAndWait()
             self.queue.task_done()
 
     def stop(self):
@@ -71,6 +82,13 @@ class TTSThread(QThread):
 class ScheduleApp(QWidget):
     """Main application for managing schedules and user interactions."""
 
+    SUMMARY_TITLES = {
+        'due_today': "Due today",
+        'overdue': "Overdue",
+        'unconfirmed': "Unconfirmed",
+        'confirmed_this_week': "Confirmed this week",
+    }
+
     def __init__(self, user):
         """Initialize the ScheduleApp window and set up necessary components."""
         super().__init__()
@@ -79,8 +97,18 @@ class ScheduleApp(QWidget):
         self.setWindowTitle("Schedule Manager")
         self.setGeometry(300, 100, 1200, 800)
         self.use_dark_theme = False
-        self.conn = sqlite3.connect('schedules.db')
-        self.cursor = self.conn.cursor()
+        profile = profile_name()
+        self.db = DatabaseInitializer('schedules.db', profile)
+        self.db.create_tables()
+        self.conn, cursor = self.db.get_connection_and_cursor()
+        self.cursor = metrics.wrap_cursor(cursor)
+        self.writer = get_write_queue('schedules.db', profile)
+        self.cache = ScheduleCache(self.cursor, change_feed=ChangeFeed(self.cursor))
+        self.visible_rows = {}
+        self.summary_day = None
+        self.summary_next = None
+        self.maintenance = MaintenanceService('schedules.db', profile)
+        self.maintenance.start()
         self.tts = TTSThread()
         self.tts.start()
         self.tray_icon = QSystemTrayIcon()
@@ -91,13 +119,21 @@ class ScheduleApp(QWidget):
         self.tray_icon.show()
         self.blink_state = False
         self.alerted_ids = set()
+        self.alerts = AlertScheduler()
+        self.load_alerts()
         self.poll_timer = QTimer()
-        self.poll_timer.timeout.connect(self.check_alerts)
+        self.poll_timer.timeout.connect(self.poll)
         self.poll_timer.start(2000)
         self.icon_1 = QIcon("info_r.png")
         self.icon_2 = QIcon("info_b.png")
         self.blink_timer = QTimer()
         self.blink_timer.timeout.connect(self.blink_tray)
+        self.diagnostics = None
+        self.edit_dialog = None
+        self.diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        self.diagnostics_shortcut.activated.connect(self.show_diagnostics)
+        # Stop background threads and export metrics when the application exits
+        QApplication.instance().aboutToQuit.connect(self.stop)
 
     def on_tray_icon_activated(self, reason):
         """Handle the tray icon activation event."""
@@ -108,17 +144,76 @@ class ScheduleApp(QWidget):
             self.raise_()
             self.activateWindow()
 
+    def poll(self):
+        """Pick up changes made by other clients, then check for due alerts."""
+        self.sync_changes()
+        if self.summary_day != date.today() or (
+                self.summary_next is not None and self.summary_next <= datetime.now().isoformat(sep='T')):
+            self.refresh_summary()
+        self.check_alerts()
+
+    def sync_changes(self):
+        """Apply schedule changes committed by other clients to the table and the alert state."""
+        with metrics.timed("ui.sync_changes"):
+            self.cache.check_consistency()
+            changes = self.cache.take_changes()
+            if changes is None:
+                self.load_alerts()
+                self.reload_table()
+                self.refresh_summary()
+                return
+            kw, df, dt = self._filters()
+            needs_reload = '%' in kw or '_' in kw
+            mine = False
+            for change in changes:
+                if change.user_id != self.uid:
+                    continue
+                mine = True
+                rec = self.cache.get(self.uid, change.schedule_id)
+                self.arm_alert(change.schedule_id, rec)
+                row = self.visible_rows.get(change.schedule_id)
+                in_view = rec is not None and rec.matches(kw) and df <= rec.end_date_time <= dt
+                if row is None and not in_view:
+                    continue
+                if row is not None and in_view and self.table.item(row, 1).text() == rec.end_date_time:
+                    self._fill_row(row, rec.as_row())
+                else:
+                    needs_reload = True
+            if needs_reload:
+                self.reload_table()
+            if mine:
+                self.refresh_summary()
+
+    def refresh_summary(self):
+        """Update the dashboard strip and the timeline from the precomputed summary counters."""
+        summary = load_summary(self.cursor, self.uid)
+        self.summary_day = date.today()
+        self.summary_next = summary['next_change']
+        for key, label in self.summary_labels.items():
+            label.setText(f"{self.SUMMARY_TITLES[key]}: {summary[key]}")
+        self.timeline.invalidate()
+
+    def load_alerts(self):
+        """Arm the alert of every unconfirmed schedule of the user that has not been announced yet."""
+        self.alerts.clear()
+        for sid, title, alert in self.cache.pending_alerts(self.uid):
+            if sid not in self.alerted_ids:
+                self.alerts.schedule(sid, alert, title)
+
+    def arm_alert(self, sid, rec):
+        """Arm, re-arm or disarm the alert of a schedule after it was added, changed or deleted."""
+        if rec is None or rec.is_confirm:
+            self.alerts.cancel(sid)
+        elif rec.alert_date_time > datetime.now().isoformat(sep='T'):
+            self.alerted_ids.discard(sid)
+            self.alerts.schedule(sid, rec.alert_date_time, rec.title)
+        elif sid not in self.alerted_ids:
+            self.alerts.schedule(sid, rec.alert_date_time, rec.title)
+
     def check_alerts(self):
         """Check and handle schedule alerts."""
-        now = datetime.now().isoformat(sep='T')
-        params = [self.uid, now] + list(self.alerted_ids) if self.alerted_ids else [self.uid, now]
-        placeholder = ','.join(['?'] * len(self.alerted_ids)) if self.alerted_ids else '0'
-
-        self.cursor.execute(
-            f"SELECT id, title FROM schedules WHERE user_id=? AND is_confirm=0 "
-            f"AND alert_date_time<=? AND id NOT IN ({placeholder})", params
-        )
-        rows = self.cursor.fetchall()
+        with metrics.timed("ui.check_alerts"):
+            rows = self.alerts.due()
         if not rows:
             return
 
@@ -144,13 +239,21 @@ class ScheduleApp(QWidget):
         self.poll_timer.stop()
         self.blink_timer.stop()
         self.tts.stop()
+        self.maintenance.stop()
+        export_path = os.environ.get('SCHEDULE_METRICS_FILE')
+        if metrics.enabled and export_path:
+            metrics.export(export_path)
+
+    def show_diagnostics(self):
+        """Show the hidden diagnostics panel (Ctrl+Shift+D)."""
+        if self.diagnostics is None:
+            self.diagnostics = DiagnosticsDialog(self)
+        self.diagnostics.show()
+        self.diagnostics.raise_()
 
     def initUI(self):
         """Initialize the UI components, including theme, toolbar, and schedule table."""
-        if self.use_dark_theme:
-            self.setStyleSheet(get_dark_theme())
-        else:
-            self.setStyleSheet(get_light_theme())
+        theme_manager.apply(self.use_dark_theme)
         layout = QVBoxLayout()
 
         toolbar = QHBoxLayout()
@@ -180,8 +283,34 @@ class ScheduleApp(QWidget):
         self.export_button.clicked.connect(self.export_data)
         toolbar.addWidget(self.export_button)
 
+        self.theme_button = QPushButton("Dark Mode")
+        self.theme_button.setCheckable(True)
+        self.theme_button.setChecked(self.use_dark_theme)
+        self.theme_button.toggled.connect(self.set_dark_theme)
+        toolbar.addWidget(self.theme_button)
+
+        self.timeline_button = QPushButton("Timeline")
+        self.timeline_button.setCheckable(True)
+        self.timeline_button.toggled.connect(self.show_timeline)
+        toolbar.addWidget(self.timeline_button)
+
+        self.timeline_mode = QComboBox()
+        self.timeline_mode.addItems(['Month', 'Week'])
+        self.timeline_mode.setEnabled(False)
+        self.timeline_mode.currentTextChanged.connect(lambda text: self.timeline.set_mode(text.lower()))
+        toolbar.addWidget(self.timeline_mode)
+
         layout.addLayout(toolbar)
 
+        dashboard = QHBoxLayout()
+        self.summary_labels = {}
+        for key in self.SUMMARY_TITLES:
+            label = QLabel()
+            self.summary_labels[key] = label
+            dashboard.addWidget(label)
+        dashboard.addStretch()
+        layout.addLayout(dashboard)
+
         self.table = QTableWidget(0, 7)
         self.table.setHorizontalHeaderLabels([
             "Title", "End Time", "Alert Time", "Status", "Note", "Created", "Actions"
@@ -195,34 +324,70 @@ class ScheduleApp(QWidget):
         self.table.setColumnWidth(5, 200)
         self.table.setColumnWidth(6, 240)
         self.table.verticalHeader().setVisible(False)
-        layout.addWidget(self.table)
+
+        self.timeline = TimelineView(self.cursor, self.uid)
+        self.timeline.day_activated.connect(self.open_day)
+
+        self.views = QStackedWidget()
+        self.views.addWidget(self.table)
+        self.views.addWidget(self.timeline)
+        layout.addWidget(self.views)
 
         self.setLayout(layout)
+        self.refresh_summary()
+        self.reload_table()
+
+    def set_dark_theme(self, status: bool):
+        """Switch the application between the light and dark theme."""
+        self.use_dark_theme = status
+        self.setUpdatesEnabled(False)
+        try:
+            theme_manager.apply(status)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def show_timeline(self, status: bool):
+        """Switch between the schedule table and the timeline view."""
+        self.views.setCurrentWidget(self.timeline if status else self.table)
+        self.timeline_mode.setEnabled(status)
+
+    def open_day(self, day):
+        """Show the schedules ending on the given day in the table."""
+        for edit, time in [(self.date_from, QTime(0, 0)), (self.date_to, QTime(23, 59, 59))]:
+            edit.blockSignals(True)
+            edit.setDateTime(QDateTime(day, time))
+            edit.blockSignals(False)
+        self.timeline_button.setChecked(False)
         self.reload_table()
 
     def reload_table(self):
         """Reload the schedule table based on the search criteria and date range."""
+        self.maintenance.touch()
+        with metrics.timed("ui.reload_table"):
+            rows = self._query_rows()
+            with metrics.timed("ui.populate_table") as timer:
+                timer.rows = len(rows)
+                self._populate_table(rows)
+
+    def _filters(self):
+        """Return the current keyword and date range as (kw, date_from, date_to)."""
         kw = self.search_edit.text()
         df = self.date_from.dateTime().toString(Qt.ISODate)
         dt = self.date_to.dateTime().toString(Qt.ISODate)
-        sql = '''
-            SELECT id, title, end_date_time, alert_date_time, is_confirm, note, create_time
-            FROM schedules
-            WHERE user_id=? AND (title LIKE ? OR note LIKE ?) AND end_date_time BETWEEN ? AND ?
-            ORDER BY end_date_time
-        '''
-        params = (self.uid, f'%{kw}%', f'%{kw}%', df, dt)
-        self.cursor.execute(sql, params)
-        rows = self.cursor.fetchall()
+        return kw, df, dt
 
+    def _query_rows(self):
+        """Return the schedule rows matching the search box and date range."""
+        return self.cache.search(self.uid, *self._filters())
+
+    def _populate_table(self, rows):
+        """Fill the table widget with the given schedule rows."""
         self.table.setRowCount(len(rows))
-        for i, (sid, title, end, alert, conf, note, created) in enumerate(rows):
-            self.table.setItem(i, 0, QTableWidgetItem(title))
-            self.table.setItem(i, 1, QTableWidgetItem(end))
-            self.table.setItem(i, 2, QTableWidgetItem(alert))
-            self.table.setItem(i, 3, QTableWidgetItem('Confirmed' if conf else 'Unconfirmed'))
-            self.table.setItem(i, 4, QTableWidgetItem(note))
-            self.table.setItem(i, 5, QTableWidgetItem(created))
+        self.visible_rows = {}
+        for i, row in enumerate(rows):
+            self._fill_row(i, row)
+            sid = row[0]
+            self.visible_rows[sid] = i
             w = QWidget()
             hb = QHBoxLayout(w)
             for lbl, fn in [('Edit', self.open_dialog), ('Delete', self.delete_by_id), ('Confirm', self.confirm_by_id)]:
@@ -232,73 +397,190 @@ class ScheduleApp(QWidget):
             hb.setContentsMargins(0,0,0,0)
             self.table.setCellWidget(i, 6, w)
 
+    def _fill_row(self, i, row):
+        """Write the data cells of table row i from a schedule row."""
+        sid, title, end, alert, conf, note, created = row
+        self.table.setItem(i, 0, QTableWidgetItem(title))
+        self.table.setItem(i, 1, QTableWidgetItem(end))
+        self.table.setItem(i, 2, QTableWidgetItem(alert))
+        self.table.setItem(i, 3, QTableWidgetItem('Confirmed' if conf else 'Unconfirmed'))
+        self.table.setItem(i, 4, QTableWidgetItem(note))
+        self.table.setItem(i, 5, QTableWidgetItem(created))
+
     def open_dialog(self, sid=None):
         """Open the dialog for adding or editing a schedule."""
-        dlg = AddEditDialog(self, sid, self.use_dark_theme)
+        self.maintenance.touch()
+        if self.edit_dialog is None:
+            self.edit_dialog = AddEditDialog(self)
+        dlg = self.edit_dialog
+        if not dlg.load(sid):
+            QMessageBox.warning(self, "Not Found", "This schedule no longer exists.")
+            self.reload_table()
+            return
         if dlg.exec_() == QDialog.Accepted:
             title, end, alert, note, conf = dlg.get_data()
             if QDateTime.fromString(alert, Qt.ISODate) > QDateTime.fromString(end, Qt.ISODate):
                 QMessageBox.warning(self, "Invalid", "Alert cannot be after End.")
                 return
             if sid:
-                self.cursor.execute(
+                updated = self.writer.execute(
                     "UPDATE schedules SET title=?, end_date_time=?, alert_date_time=?, note=?, is_confirm=? WHERE id=?",
                     (title, end, alert, note, conf, sid)
-                )
+                ).result()
+                if not updated.rowcount:
+                    QMessageBox.warning(self, "Not Found", "This schedule no longer exists.")
+                    self.reload_table()
+                    return
             else:
-                self.cursor.execute(
+                sid = self.writer.execute(
                     "INSERT INTO schedules (title, user_id, end_date_time, alert_date_time, is_confirm, note) VALUES (?,?,?,?,?,?)",
                     (title, self.uid, end, alert, conf, note)
-                )
-            self.conn.commit()
+                ).result().lastrowid
+            self.cache.refresh(self.uid, sid)
+            self.arm_alert(sid, self.cache.get(self.uid, sid))
             self.reload_table()
+            self.refresh_summary()
 
     def delete_by_id(self, sid):
         """Delete a schedule by its ID."""
-        self.cursor.execute("DELETE FROM schedules WHERE id=?", (sid,))
-        self.conn.commit()
+        self.writer.execute("DELETE FROM schedules WHERE id=?", (sid,)).result()
+        self.cache.discard(self.uid, sid)
+        self.alerts.cancel(sid)
         self.reload_table()
+        self.refresh_summary()
 
     def confirm_by_id(self, sid):
         """Mark a schedule as confirmed by its ID."""
-        self.cursor.execute("UPDATE schedules SET is_confirm=1 WHERE id=?", (sid,))
-        self.conn.commit()
+        self.writer.execute("UPDATE schedules SET is_confirm=1 WHERE id=?", (sid,)).result()
+        self.cache.refresh(self.uid, sid)
+        self.alerts.cancel(sid)
         self.reload_table()
+        self.refresh_summary()
 
     def export_data(self):
         """Export the user's schedule data to a CSV file."""
+        self.maintenance.touch()
         path, _ = QFileDialog.getSaveFileName(self, "Save CSV", filter="*.csv")
         if not path:
             return
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                self.cursor.execute(
-                    "SELECT title, end_date_time, alert_date_time, is_confirm, note, create_time FROM schedules WHERE user_id=?",
-                    (self.uid,)
-                )
+            with metrics.timed("export_data"), open(path, 'w', encoding='utf-8') as f:
                 f.write('Title,End,Alert,Status,Note,Created\n')
-                for row in self.cursor.fetchall():
-                    status = 'Confirmed' if row[3] else 'Unconfirmed'
-                    line = [row[0], row[1], row[2], status, row[4], row[5]]
+                for _, title, end, alert, conf, note, created in self.cache.rows(self.uid):
+                    status = 'Confirmed' if conf else 'Unconfirmed'
+                    line = [title, end, alert, status, note, created]
                     f.write(','.join(line) + '\n')
             QMessageBox.information(self, "Export", "Exported successfully.")
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
+class DiagnosticsDialog(QDialog):
+    """Hidden panel showing live instrumentation data."""
+
+    COLUMNS = ["Operation", "Count", "p50 (ms)", "p95 (ms)", "Max (ms)", "Rows"]
+
+    def __init__(self, parent=None):
+        """Build the metrics table, slow query log and export controls."""
+        super().__init__(parent)
+        self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
+        self.setWindowTitle("Diagnostics")
+        self.resize(900, 600)
+
+        lo = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.enabled_check = QCheckBox("Collect metrics")
+        self.enabled_check.setChecked(metrics.enabled)
+        self.enabled_check.toggled.connect(self.set_enabled)
+        controls.addWidget(self.enabled_check)
+        for lbl, fn in [('Reset', self.reset), ('Export JSON', self.export_json),
+                        ('Export Prometheus', self.export_prometheus)]:
+            btn = QPushButton(lbl)
+            btn.clicked.connect(fn)
+            controls.addWidget(btn)
+        lo.addLayout(controls)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setColumnWidth(0, 420)
+        self.table.verticalHeader().setVisible(False)
+        lo.addWidget(self.table)
+
+        lo.addWidget(QLabel("Slow queries"))
+        self.slow_log = QPlainTextEdit()
+        self.slow_log.setReadOnly(True)
+        lo.addWidget(self.slow_log)
+
+        lo.addWidget(QLabel("Maintenance"))
+        self.maintenance_log = QPlainTextEdit()
+        self.maintenance_log.setReadOnly(True)
+        self.maintenance_log.setMaximumHeight(90)
+        lo.addWidget(self.maintenance_log)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        """Start live refreshing while the panel is visible."""
+        self.refresh()
+        self.refresh_timer.start(1000)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        """Stop refreshing when the panel is hidden."""
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        """Reload the panel from the current metrics snapshot."""
+        snap = metrics.snapshot()
+        items = list(snap['metrics'].items())
+        self.table.setRowCount(len(items))
+        for i, (name, data) in enumerate(items):
+            values = [name, data['count'], data['p50'] * 1000, data['p95'] * 1000, data['max'] * 1000, data['rows']]
+            for col, value in enumerate(values):
+                text = f"{value:.2f}" if isinstance(value, float) else str(value)
+                self.table.setItem(i, col, QTableWidgetItem(text))
+        self.slow_log.setPlainText("\n\n".join(
+            f"[{q['at']}] {q['seconds'] * 1000:.1f} ms\n{q['sql']}\n  " + "\n  ".join(q['plan'])
+            for q in reversed(snap['slow_queries'])
+        ))
+        status = self.parent().maintenance.status
+        self.maintenance_log.setPlainText("\n".join(
+            f"{name}: {entry['at']} {entry.get('error') or entry['result']}" for name, entry in status.items()
+        ))
+
+    def set_enabled(self, status: bool):
+        """Switch metric collection on or off."""
+        metrics.enabled = status
+
+    def reset(self):
+        """Discard all collected metrics."""
+        metrics.reset()
+        self.refresh()
+
+    def export_json(self):
+        """Export the collected metrics to a JSON file."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", filter="*.json")
+        if path:
+            metrics.export_json(path)
+
+    def export_prometheus(self):
+        """Export the collected metrics to a Prometheus text file."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", filter="*.prom")
+        if path:
+            metrics.export_prometheus(path)
+
+
 class AddEditDialog(QDialog):
     """Dialog for adding or editing a schedule entry."""
 
-    def __init__(self, parent=None, sid=None, use_dark_theme=False):
-        """Initialize the dialog with schedule data if editing an existing entry."""
+    def __init__(self, parent=None):
+        """Build the dialog once; load() prepares it for each add or edit."""
         super().__init__(parent)
-        self.sid = sid
+        self.sid = None
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
-        self.setWindowTitle("Edit" if sid else "Add New")
         self.setFixedSize(360, 380)
-        if use_dark_theme:
-            self.setStyleSheet(get_dark_theme())
-        else:
-            self.setStyleSheet(get_light_theme())
 
         lo = QVBoxLayout(self)
         lo.addWidget(QLabel("Title"))
@@ -306,13 +588,13 @@ class AddEditDialog(QDialog):
         lo.addWidget(self.title_edit)
 
         lo.addWidget(QLabel("End DateTime"))
-        self.end_edit = QDateTimeEdit(QDateTime.currentDateTime(), self)
+        self.end_edit = QDateTimeEdit(self)
         self.end_edit.setCalendarPopup(True)
         self.end_edit.setDisplayFormat("yyyy-MM-dd HH:mm")
         lo.addWidget(self.end_edit)
 
         lo.addWidget(QLabel("Alert DateTime"))
-        self.alert_edit = QDateTimeEdit(QDateTime.currentDateTime(), self)
+        self.alert_edit = QDateTimeEdit(self)
         self.alert_edit.setCalendarPopup(True)
         self.alert_edit.setDisplayFormat("yyyy-MM-dd HH:mm")
         lo.addWidget(self.alert_edit)
@@ -321,26 +603,47 @@ class AddEditDialog(QDialog):
         self.note_edit = QLineEdit(self)
         lo.addWidget(self.note_edit)
 
-        if sid:
-            lo.addWidget(QLabel("Status"))
-            self.status_combo = QComboBox(self)
-            self.status_combo.addItems(['Unconfirmed', 'Confirmed'])
-            lo.addWidget(self.status_combo)
+        self.status_label = QLabel("Status")
+        lo.addWidget(self.status_label)
+        self.status_combo = QComboBox(self)
+        self.status_combo.addItems(['Unconfirmed', 'Confirmed'])
+        lo.addWidget(self.status_combo)
 
         bb = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
         bb.accepted.connect(self.accept)
         bb.rejected.connect(self.reject)
         lo.addWidget(bb)
 
+    def load(self, sid=None):
+        """
+        Reset the fields for a new entry, or fill them from the cached schedule when editing.
+        Returns False if the schedule no longer exists, e.g. deleted by another client.
+        """
+        rec = None
         if sid:
-            c = parent.cursor
-            c.execute("SELECT title,end_date_time,alert_date_time,note,is_confirm FROM schedules WHERE id=?", (sid,))
-            title, end, alert, note, conf = c.fetchone()
-            self.title_edit.setText(title)
-            self.end_edit.setDateTime(QDateTime.fromString(end, Qt.ISODate))
-            self.alert_edit.setDateTime(QDateTime.fromString(alert, Qt.ISODate))
-            self.note_edit.setText(note)
-            self.status_combo.setCurrentIndex(1 if conf else 0)
+            parent = self.parent()
+            rec = parent.cache.get(parent.uid, sid)
+            if rec is None:
+                return False
+        self.sid = sid
+        self.setWindowTitle("Edit" if sid else "Add New")
+        self.status_label.setVisible(bool(sid))
+        self.status_combo.setVisible(bool(sid))
+        if rec is not None:
+            self.title_edit.setText(rec.title)
+            self.end_edit.setDateTime(QDateTime.fromString(rec.end_date_time, Qt.ISODate))
+            self.alert_edit.setDateTime(QDateTime.fromString(rec.alert_date_time, Qt.ISODate))
+            self.note_edit.setText(rec.note)
+            self.status_combo.setCurrentIndex(1 if rec.is_confirm else 0)
+        else:
+            now = QDateTime.currentDateTime()
+            self.title_edit.clear()
+            self.end_edit.setDateTime(now)
+            self.alert_edit.setDateTime(now)
+            self.note_edit.clear()
+            self.status_combo.setCurrentIndex(0)
+        self.title_edit.setFocus()
+        return True
 
     def get_data(self):
         """Retrieve and validate data from the input fields."""
@@ -348,7 +651,7 @@ class AddEditDialog(QDialog):
         end = self.end_edit.dateTime().toString(Qt.ISODate)
         alert = self.alert_edit.dateTime().toString(Qt.ISODate)
         note = self.note_edit.text().strip()
-        conf = 1 if (hasattr(self, 'status_combo') and self.status_combo.currentText() == 'Confirmed') else 0
+        conf = 1 if (self.sid and self.status_combo.currentText() == 'Confirmed') else 0
 
         # Validation: Both alert and end times must be after current time
         current_time = QDateTime.currentDateTime().toString(Qt.ISODate)
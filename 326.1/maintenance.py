@@ -0,0 +1,187 @@
+"""
+maintenance.py
+
+This module keeps schedules.db healthy in the background. MaintenanceService
+runs on its own thread and connection and, while the application is idle:
+
+- takes online snapshots with sqlite3.Connection.backup, copying a batch of
+  pages at a time and sleeping in between so other connections keep working;
+- returns free pages to the file system with PRAGMA incremental_vacuum in
+  small steps, and runs PRAGMA optimize;
+- prunes old entries from the schedule_changes log;
+- runs PRAGMA quick_check on a schedule and records the result.
+
+Nothing here runs on the GUI thread or touches the alert path.
+"""
+
+import argparse
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+
+from change_sync import prune_changes
+from database_init import DatabaseInitializer
+from instrumentation import metrics
+from write_queue import get_write_queue
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+def vacuum_pages(cursor, pages):
+    """Return up to the given number of free pages to the file system."""
+    # incremental_vacuum frees one page per step, but the sqlite3 module steps a
+    # statement that returns no rows only once, so request the pages one by one.
+    for _ in range(pages):
+        cursor.execute("PRAGMA incremental_vacuum(1)")
+
+
+class MaintenanceService(threading.Thread):
+    """Background thread performing backups, compaction and integrity checks during idle periods."""
+
+    def __init__(self, db_name="schedules.db", profile="default", backup_dir="backups", keep_backups=7,
+                 backup_interval=DAY, integrity_interval=DAY, compact_interval=HOUR, idle_seconds=60,
+                 poll_seconds=30, backup_pages=256, vacuum_pages=256, change_log_days=7):
+        super().__init__(name="schedule-maintenance", daemon=True)
+        self.db = DatabaseInitializer(db_name, profile)
+        self.writer = get_write_queue(db_name, profile)
+        self.backup_dir = backup_dir
+        self.keep_backups = keep_backups
+        self.idle_seconds = idle_seconds
+        self.poll_seconds = poll_seconds
+        self.backup_pages = backup_pages
+        self.vacuum_pages = vacuum_pages
+        self.change_log_days = change_log_days
+        self.tasks = [
+            ('integrity', integrity_interval, self.check_integrity),
+            ('compact', compact_interval, self.compact),
+            ('backup', backup_interval, self.backup),
+        ]
+        self.last_run = {}
+        snapshots = self.snapshots()
+        if snapshots:
+            # Count the backup interval from the newest snapshot, not from launch,
+            # so restarting the application does not rotate out older snapshots.
+            age = max(0.0, time.time() - os.path.getmtime(snapshots[-1]))
+            self.last_run['backup'] = time.monotonic() - age
+        self.last_activity = time.monotonic()
+        self.stop_event = threading.Event()
+        self.status = {}
+
+    def touch(self):
+        """Record user activity; maintenance waits for idle_seconds without activity."""
+        self.last_activity = time.monotonic()
+
+    def is_idle(self):
+        """Return True if there has been no activity for idle_seconds."""
+        return time.monotonic() - self.last_activity >= self.idle_seconds
+
+    def stop(self):
+        """Ask the thread to finish its current step and exit."""
+        self.stop_event.set()
+
+    def run(self):
+        """Run due tasks whenever the application is idle, until stop() is called."""
+        while not self.stop_event.wait(self.poll_seconds):
+            self.run_due_tasks()
+        self.db.close_connection()
+
+    def run_due_tasks(self):
+        """Run every task whose interval has elapsed, stopping early if the user becomes active."""
+        for name, interval, task in self.tasks:
+            if self.stop_event.is_set() or not self.is_idle():
+                return
+            now = time.monotonic()
+            if now - self.last_run.get(name, float('-inf')) < interval:
+                continue
+            self.last_run[name] = now
+            try:
+                with metrics.timed(f"maintenance.{name}"):
+                    result = task()
+                self.status[name] = {'at': datetime.now().isoformat(sep=' ', timespec='seconds'), 'result': result}
+            except Exception as e:
+                self.status[name] = {'at': datetime.now().isoformat(sep=' ', timespec='seconds'), 'error': str(e)}
+
+    def connection(self):
+        """Return the service's own connection, opening it on first use."""
+        conn, _ = self.db.get_connection_and_cursor()
+        return conn
+
+    def snapshots(self):
+        """Return the paths of the snapshots in backup_dir, oldest first."""
+        base = os.path.splitext(os.path.basename(self.db.db_name))[0]
+        return sorted(glob.glob(os.path.join(self.backup_dir, f"{base}-*.db")))
+
+    def backup(self):
+        """Write a snapshot of the database into backup_dir and remove the oldest extra snapshots."""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        base = os.path.splitext(os.path.basename(self.db.db_name))[0]
+        path = os.path.join(self.backup_dir, f"{base}-{datetime.now():%Y%m%d-%H%M%S}.db")
+        tmp = path + ".part"
+        try:
+            dst = DatabaseInitializer(tmp, 'low_memory').open_connection()
+            try:
+                self.connection().backup(dst, pages=self.backup_pages, sleep=0.05)
+            finally:
+                dst.close()
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        for old in self.snapshots()[:-self.keep_backups]:
+            os.remove(old)
+        return path
+
+    def compact(self):
+        """Prune the change log, release free pages in small steps and refresh planner statistics."""
+        conn = self.connection()
+        pruned = self.writer.submit(lambda cursor: prune_changes(cursor, self.change_log_days)).result()
+        freed = 0
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            while not self.stop_event.is_set() and self.is_idle():
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free:
+                    break
+                step = min(free, self.vacuum_pages)
+                self.writer.submit(lambda cursor: vacuum_pages(cursor, step)).result()
+                freed += step
+                time.sleep(0.05)
+        conn.execute("PRAGMA optimize")
+        return {'pruned_changes': pruned, 'freed_pages': freed}
+
+    def check_integrity(self):
+        """Run PRAGMA quick_check and return its messages ('ok' when the database is sound)."""
+        rows = self.connection().execute("PRAGMA quick_check").fetchall()
+        return [row[0] for row in rows]
+
+    def convert(self):
+        """
+        Switch an existing database to incremental auto-vacuum. This rebuilds the
+        file with VACUUM and blocks writers while it runs, so it is only offered
+        from the command line.
+        """
+        conn = self.connection()
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run schedules.db maintenance tasks once")
+    parser.add_argument("--db", default="schedules.db")
+    parser.add_argument("--backup-dir", default="backups")
+    parser.add_argument("--backup", action="store_true", help="take a snapshot")
+    parser.add_argument("--compact", action="store_true", help="prune, incremental vacuum and optimize")
+    parser.add_argument("--check", action="store_true", help="run an integrity check")
+    parser.add_argument("--convert", action="store_true", help="enable incremental vacuum (runs VACUUM)")
+    args = parser.parse_args()
+
+    service = MaintenanceService(args.db, backup_dir=args.backup_dir, idle_seconds=0)
+    for flag, task in [(args.convert, service.convert), (args.check, service.check_integrity),
+                       (args.compact, service.compact), (args.backup, service.backup)]:
+        if flag:
+            print(f"{task.__name__}: {task()}")
+    service.db.close_connection()
@@ -0,0 +1,257 @@
+"""
+schedule_cache.py
+
+This module provides an in-memory, per-user read-through cache of schedule
+rows. Each cached user keeps compact __slots__ records ordered by end time so
+date-range queries are answered with a binary search instead of a SELECT.
+
+The cache is bounded by an approximate memory budget (see record_size) and
+evicts the least recently used user when the budget is exceeded. Users whose
+schedules alone exceed the budget are served straight from SQLite. Writes made through the owning connection
+are applied with refresh()/discard(); commits from other connections are
+detected through PRAGMA data_version and, when a ChangeFeed is supplied,
+applied row by row from the change log instead of dropping the cache.
+"""
+
+import sys
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+SELECT_COLUMNS = "id, title, end_date_time, alert_date_time, is_confirm, note, create_time"
+
+# Approximate bytes held by one cached record besides the characters of its
+# strings: the record, its sort key, the list slots and by_id entry, and the
+# five str object headers (measured with tracemalloc on CPython 3.11).
+RECORD_OVERHEAD = 460
+LOAD_BATCH = 1000
+
+
+def record_size(row):
+    """Return the approximate memory held by a cached copy of a row in SELECT_COLUMNS order."""
+    return RECORD_OVERHEAD + sum(len(value) for value in row if isinstance(value, str))
+
+
+class ScheduleRecord:
+    """Compact in-memory copy of one schedules row."""
+
+    __slots__ = ('id', 'title', 'end_date_time', 'alert_date_time', 'is_confirm', 'note', 'create_time')
+
+    def __init__(self, row):
+        (self.id, self.title, self.end_date_time, self.alert_date_time,
+         self.is_confirm, self.note, self.create_time) = row
+
+    @property
+    def key(self):
+        """Sort key used to keep a user's records ordered by end time."""
+        return self.end_date_time, self.id
+
+    def as_row(self):
+        """Return the record as a tuple in SELECT_COLUMNS order."""
+        return (self.id, self.title, self.end_date_time, self.alert_date_time,
+                self.is_confirm, self.note, self.create_time)
+
+    def matches(self, kw):
+        """Return True if the keyword occurs in the title or note, like the LIKE filter in reload_table."""
+        if not kw:
+            return True
+        kw = kw.lower()
+        return kw in (self.title or '').lower() or kw in (self.note or '').lower()
+
+
+class _UserSchedules:
+    """Records of one user, indexed by id and ordered by (end_date_time, id)."""
+
+    __slots__ = ('by_id', 'keys', 'records', 'nbytes')
+
+    def __init__(self, rows):
+        self.records = [ScheduleRecord(row) for row in rows]
+        self.records.sort(key=lambda r: r.key)
+        self.keys = [r.key for r in self.records]
+        self.by_id = {r.id: r for r in self.records}
+        self.nbytes = sum(record_size(row) for row in rows)
+
+    def __len__(self):
+        return len(self.records)
+
+    def put(self, record):
+        """Insert or replace a record, keeping the end-time order."""
+        self.remove(record.id)
+        i = bisect_right(self.keys, record.key)
+        self.keys.insert(i, record.key)
+        self.records.insert(i, record)
+        self.by_id[record.id] = record
+        self.nbytes += record_size(record.as_row())
+
+    def remove(self, sid):
+        """Remove the record with the given id, returning True if it was present."""
+        record = self.by_id.pop(sid, None)
+        if record is None:
+            return False
+        i = bisect_left(self.keys, record.key)
+        del self.keys[i]
+        del self.records[i]
+        self.nbytes -= record_size(record.as_row())
+        return True
+
+    def between(self, df, dt):
+        """Return the records whose end time lies within [df, dt]."""
+        lo = bisect_left(self.keys, (df,))
+        hi = bisect_right(self.keys, (dt, sys.maxsize))
+        return self.records[lo:hi]
+
+
+class ScheduleCache:
+    """Per-user read-through cache of the schedules table."""
+
+    def __init__(self, cursor, max_bytes=64 * 1024 * 1024, change_feed=None):
+        self.cursor = cursor
+        self.max_bytes = max_bytes
+        self.change_feed = change_feed
+        self.users = OrderedDict()
+        self.oversized = set()
+        self.size = 0
+        self.data_version = None
+        self.changes = []
+
+    def clear(self):
+        """Drop every cached user."""
+        self.users.clear()
+        self.oversized.clear()
+        self.size = 0
+
+    def check_consistency(self):
+        """
+        Bring the cache up to date if another connection committed since the last check.
+        Return True if anything changed; the changes are collected by take_changes().
+        """
+        self.cursor.execute("PRAGMA data_version")
+        version = self.cursor.fetchone()[0]
+        changed = self.data_version is not None and version != self.data_version
+        self.data_version = version
+        if not changed:
+            return False
+        changes = self.change_feed.pull() if self.change_feed is not None else None
+        if changes is None:
+            self.clear()
+            self.changes = None
+            return True
+        by_user = {}
+        for change in changes:
+            by_user.setdefault(change.user_id, []).append(change.schedule_id)
+        for uid, sids in by_user.items():
+            self.refresh(uid, *sids)
+        if self.changes is not None:
+            self.changes.extend(changes)
+        return True
+
+    def take_changes(self):
+        """
+        Return the Change entries applied since the last call, or None if the cache
+        was dropped and every view of the data must be rebuilt.
+        """
+        changes, self.changes = self.changes, []
+        return changes
+
+    def _user(self, uid):
+        """Return the cached schedules of a user, loading them on a miss, or None if the user is not cacheable."""
+        self.check_consistency()
+        if uid in self.oversized:
+            return None
+        user = self.users.get(uid)
+        if user is not None:
+            self.users.move_to_end(uid)
+            return user
+        self.cursor.execute(f"SELECT {SELECT_COLUMNS} FROM schedules WHERE user_id=?", (uid,))
+        rows = []
+        nbytes = 0
+        while True:
+            batch = self.cursor.fetchmany(LOAD_BATCH)
+            rows += batch
+            nbytes += sum(record_size(row) for row in batch)
+            if nbytes > self.max_bytes:
+                self.oversized.add(uid)
+                return None
+            if len(batch) < LOAD_BATCH:
+                break
+        user = self.users[uid] = _UserSchedules(rows)
+        self.size += user.nbytes
+        self._evict()
+        return user
+
+    def _evict(self):
+        """Evict least recently used users until the memory budget is respected."""
+        while self.size > self.max_bytes and len(self.users) > 1:
+            _, user = self.users.popitem(last=False)
+            self.size -= user.nbytes
+
+    def search(self, uid, kw, df, dt):
+        """Return rows of a user matching kw with end time in [df, dt], ordered by end time."""
+        user = self._user(uid)
+        if user is None or '%' in kw or '_' in kw:
+            self.cursor.execute(
+                f"SELECT {SELECT_COLUMNS} FROM schedules "
+                "WHERE user_id=? AND (title LIKE ? OR note LIKE ?) AND end_date_time BETWEEN ? AND ? "
+                "ORDER BY end_date_time",
+                (uid, f'%{kw}%', f'%{kw}%', df, dt)
+            )
+            return self.cursor.fetchall()
+        return [r.as_row() for r in user.between(df, dt) if r.matches(kw)]
+
+    def get(self, uid, sid):
+        """Return the record with the given id belonging to the user, or None."""
+        user = self._user(uid)
+        if user is not None:
+            return user.by_id.get(sid)
+        self.cursor.execute(f"SELECT {SELECT_COLUMNS} FROM schedules WHERE id=? AND user_id=?", (sid, uid))
+        row = self.cursor.fetchone()
+        return ScheduleRecord(row) if row else None
+
+    def rows(self, uid):
+        """Return all rows of a user ordered by end time."""
+        user = self._user(uid)
+        if user is None:
+            self.cursor.execute(
+                f"SELECT {SELECT_COLUMNS} FROM schedules WHERE user_id=? ORDER BY end_date_time", (uid,)
+            )
+            return self.cursor.fetchall()
+        return [r.as_row() for r in user.records]
+
+    def pending_alerts(self, uid):
+        """Return (id, title, alert_date_time) of every unconfirmed schedule of a user."""
+        user = self._user(uid)
+        if user is None:
+            self.cursor.execute(
+                "SELECT id, title, alert_date_time FROM schedules WHERE user_id=? AND is_confirm=0", (uid,)
+            )
+            return self.cursor.fetchall()
+        return [(r.id, r.title, r.alert_date_time) for r in user.records if not r.is_confirm]
+
+    def refresh(self, uid, *sids):
+        """Re-read the given rows of a user so the cached copies match the database."""
+        user = self.users.get(uid)
+        if user is None:
+            return
+        before = user.nbytes
+        for start in range(0, len(sids), 500):
+            chunk = sids[start:start + 500]
+            placeholder = ','.join(['?'] * len(chunk))
+            self.cursor.execute(
+                f"SELECT {SELECT_COLUMNS} FROM schedules WHERE user_id=? AND id IN ({placeholder})", (uid, *chunk)
+            )
+            found = set()
+            for row in self.cursor.fetchall():
+                user.put(ScheduleRecord(row))
+                found.add(row[0])
+            for sid in chunk:
+                if sid not in found:
+                    user.remove(sid)
+        self.size += user.nbytes - before
+        self._evict()
+
+    def discard(self, uid, sid):
+        """Remove one row from the cache after a local delete."""
+        user = self.users.get(uid)
+        if user is not None:
+            before = user.nbytes
+            user.remove(sid)
+            self.size += user.nbytes - before
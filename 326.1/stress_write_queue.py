@@ -0,0 +1,127 @@
+"""
+stress_write_queue.py
+
+Multi-process stress test for write_queue.py. Several processes, each with
+several threads, insert, update and delete schedules in the same database as
+fast as they can. Each process uses its own single writer, so the processes
+compete only with each other for the database lock.
+
+The run passes when no write failed (in particular none with "database is
+locked") and the number of rows left matches the number of successful
+inserts minus deletes. Use --baseline to run the same load through
+short-lived connections without busy timeout or writer queue (the way
+login_gui used to write) for comparison.
+
+    python stress_write_queue.py --processes 8 --threads 8 --writes 500
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from database_init import DatabaseInitializer
+from write_queue import get_write_queue
+
+INSERT_SQL = ("INSERT INTO schedules (title, user_id, end_date_time, alert_date_time, is_confirm, note) "
+              "VALUES (?,?,?,?,?,?)")
+
+
+def write_load(db_name, worker, threads, writes, baseline):
+    """Run the write load of one process and return (inserted, deleted, errors, locked_errors)."""
+    counts = {'inserted': 0, 'deleted': 0, 'errors': 0, 'locked': 0}
+    lock = threading.Lock()
+    writer = None if baseline else get_write_queue(db_name)
+
+    def run_statement(sql, params):
+        if writer is not None:
+            return writer.execute(sql, params).result()
+        conn = sqlite3.connect(db_name, timeout=0)
+        try:
+            cur = conn.execute(sql, params)
+            conn.commit()
+            return cur
+        finally:
+            conn.close()
+
+    def thread_load(thread):
+        uid = worker * 1000 + thread
+        own = []
+        for i in range(writes):
+            try:
+                if i % 5 == 4 and own:
+                    run_statement("DELETE FROM schedules WHERE id=?", (own.pop(),))
+                    key = 'deleted'
+                elif i % 5 == 3 and own:
+                    run_statement("UPDATE schedules SET is_confirm=1 WHERE id=?", (own[-1],))
+                    key = None
+                else:
+                    result = run_statement(INSERT_SQL, (f"stress {i}", uid, "2030-01-01T10:00:00",
+                                                        "2030-01-01T09:00:00", 0, "stress"))
+                    own.append(result.lastrowid)
+                    key = 'inserted'
+            except sqlite3.OperationalError as e:
+                with lock:
+                    counts['errors'] += 1
+                    counts['locked'] += 'locked' in str(e) or 'busy' in str(e)
+                continue
+            if key:
+                with lock:
+                    counts[key] += 1
+
+    pool = [threading.Thread(target=thread_load, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    if writer is not None:
+        writer.close()
+    return counts['inserted'], counts['deleted'], counts['errors'], counts['locked']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent multi-process write stress test")
+    parser.add_argument("--db", help="database file (default: a temporary file)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=300, help="writes per thread")
+    parser.add_argument("--baseline", action="store_true", help="write without the queue or busy timeout")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    db_name = args.db
+    if db_name is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_name = os.path.join(tmp_dir.name, "stress.db")
+    db_initializer = DatabaseInitializer(db_name)
+    db_initializer.create_tables()
+    before = db_initializer.connection.execute("SELECT COUNT(*) FROM schedules").fetchone()[0]
+    db_initializer.close_connection()
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.processes) as pool:
+        results = list(pool.map(write_load, [db_name] * args.processes, range(args.processes),
+                                [args.threads] * args.processes, [args.writes] * args.processes,
+                                [args.baseline] * args.processes))
+    elapsed = time.perf_counter() - start
+
+    inserted, deleted, errors, locked = (sum(column) for column in zip(*results))
+    conn = sqlite3.connect(db_name)
+    rows = conn.execute("SELECT COUNT(*) FROM schedules").fetchone()[0] - before
+    conn.close()
+    attempted = args.processes * args.threads * args.writes
+    print(f"{attempted} writes from {args.processes} processes x {args.threads} threads in {elapsed:.2f}s "
+          f"({attempted / elapsed:.0f} writes/s)")
+    print(f"errors: {errors} (database is locked/busy: {locked})")
+    print(f"rows: expected {inserted - deleted}, found {rows}")
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    return 0 if errors == 0 and rows == inserted - deleted else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
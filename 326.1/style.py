@@ -4,8 +4,16 @@ style.py
 This module provides functions that return Qt-compatible style sheets (QSS)
 for light and dark themes. The styles affect the appearance of common widgets
 such as QWidget, QPushButton, QTableWidget, and form elements.
+
+ThemeManager installs a single style sheet on the QApplication so that Qt
+parses it once for the whole application, instead of once per window or
+dialog, and can switch themes while the application is running.
 """
 
+from functools import lru_cache
+
+from PyQt5.QtWidgets import QApplication
+
 def get_light_theme():
     """Return the light theme style sheet as a string."""
     return """
@@ -114,3 +122,94 @@ def get_dark_theme():
         color: #fff;
     }
     """
+
+
+def get_login_styles():
+    """Return the style sheet for the login and registration windows, shared by both themes."""
+    return """
+    #loginWindow, #registerDialog,
+    #loginWindow QLabel, #registerDialog QLabel, #loginWindow QCheckBox {
+        background-color: #ecf0f1;
+        color: #2c2c2c;
+    }
+
+    #loginWindow QCheckBox {
+        font-size: 13px;
+    }
+
+    #loginTitle, #registerTitle {
+        color: #2c3e50;
+        font-family: "Segoe UI";
+        font-weight: bold;
+    }
+
+    #loginTitle {
+        font-size: 18pt;
+    }
+
+    #registerTitle {
+        font-size: 16pt;
+    }
+
+    #loginWindow QLineEdit, #registerDialog QLineEdit {
+        background-color: #ffffff;
+        color: #2c2c2c;
+        border: 2px solid #bdc3c7;
+        border-radius: 5px;
+        padding: 5px 10px;
+        font-size: 14px;
+    }
+
+    #loginWindow QLineEdit:focus, #registerDialog QLineEdit:focus {
+        border-color: #3498db;
+    }
+
+    QPushButton#loginButton, QPushButton#registerButton {
+        color: white;
+        border: none;
+        border-radius: 5px;
+        font-size: 14px;
+    }
+
+    QPushButton#loginButton {
+        background-color: #3498db;
+    }
+
+    QPushButton#loginButton:hover {
+        background-color: #2980b9;
+    }
+
+    QPushButton#registerButton {
+        background-color: #2ecc71;
+    }
+
+    QPushButton#registerButton:hover {
+        background-color: #27ae60;
+    }
+    """
+
+
+class ThemeManager:
+    """Applies one application-wide style sheet and switches between light and dark themes."""
+
+    def __init__(self):
+        self.dark = None
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def stylesheet(dark):
+        """Return the complete application style sheet for a theme, built once per theme."""
+        theme = get_dark_theme() if dark else get_light_theme()
+        return theme + get_login_styles()
+
+    def apply(self, dark):
+        """Install the light or dark style sheet on the running QApplication if it is not already active."""
+        dark = bool(dark)
+        if dark == self.dark:
+            return
+        QApplication.instance().setStyleSheet(self.stylesheet(dark))
+        self.dark = dark
+
+
+# Process-wide instance shared by the login window and the main application.
+theme_manager = ThemeManager()
@@ -0,0 +1,56 @@
+"""
+summary.py
+
+This module reads the per-user summary counters maintained by triggers on the
+schedules table (see DatabaseInitializer.create_counters). Every figure comes
+from primary-key lookups on small aggregate tables, so the cost does not
+depend on how many schedules a user has. The only exception is today's
+schedules, which are read through the (user_id, end_date_time) index to tell
+which of them are already past their end time.
+"""
+
+from datetime import datetime, timedelta
+
+
+def load_summary(cursor, uid, now=None):
+    """
+    Return the dashboard counters of a user as a dictionary with the keys
+    due_today, overdue, unconfirmed and confirmed_this_week. Overdue means
+    unconfirmed with an end time before now, as in reporting.py; next_change
+    is the end time at which it grows next today, or None.
+    """
+    now = now or datetime.now()
+    today = now.date()
+    today_start = f"{today.isoformat()}T00:00:00"
+    now_text = now.isoformat(sep='T')
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+    cursor.execute(
+        '''
+        SELECT
+            (SELECT unconfirmed FROM schedule_daily_counts WHERE user_id=? AND day=?),
+            (SELECT SUM(unconfirmed) FROM schedule_daily_counts WHERE user_id=? AND day>=?),
+            (SELECT unconfirmed FROM schedule_user_counts WHERE user_id=?),
+            (SELECT SUM(confirmed) FROM schedule_daily_counts WHERE user_id=? AND day BETWEEN ? AND ?)
+        ''',
+        (uid, today.isoformat(), uid, today.isoformat(), uid, uid, week_start.isoformat(), week_end.isoformat())
+    )
+    due_today, not_yet_due, unconfirmed, confirmed_this_week = (v or 0 for v in cursor.fetchone())
+    cursor.execute(
+        '''
+        SELECT
+            (SELECT COUNT(*) FROM schedules
+             WHERE user_id=? AND end_date_time>=? AND end_date_time<? AND NOT is_confirm),
+            (SELECT MIN(end_date_time) FROM schedules
+             WHERE user_id=? AND end_date_time>=? AND end_date_time<? AND NOT is_confirm)
+        ''',
+        (uid, today_start, now_text, uid, now_text, f"{(today + timedelta(days=1)).isoformat()}T00:00:00")
+    )
+    passed_today, next_change = cursor.fetchone()
+    return {
+        'due_today': due_today,
+        'overdue': unconfirmed - not_yet_due + passed_today,
+        'unconfirmed': unconfirmed,
+        'confirmed_this_week': confirmed_this_week,
+        'next_change': next_change,
+    }
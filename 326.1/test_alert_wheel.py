@@ -0,0 +1,80 @@
+import random
+from datetime import datetime, timedelta
+
+from alert_wheel import AlertScheduler, TimingWheel
+
+
+class TestTimingWheel:
+    """ Unit tests for TimingWheel against a brute-force model.
+    """
+    def test_matches_brute_force(self):
+        """ Test random schedules, cancels and advances, including entries beyond the top level.
+        """
+        rng = random.Random(11)
+        wheel = TimingWheel(tick=1.0, slots=8, levels=3, start=0)
+        model = {}
+        now = 0
+        for step in range(3000):
+            op = rng.random()
+            if op < 0.5:
+                key = rng.randrange(400)
+                when = now + rng.choice([rng.uniform(-5, 5), rng.uniform(0, 600), rng.uniform(0, 5000)])
+                wheel.schedule(key, when, key)
+                model[key] = int(when // 1.0)
+            elif op < 0.65:
+                key = rng.randrange(400)
+                assert wheel.cancel(key) == (model.pop(key, None) is not None)
+            else:
+                now += rng.choice([0, 1, rng.randint(1, 70), rng.randint(1, 700)])
+                fired = wheel.advance(now)
+                due = {key for key, tick in model.items() if tick <= now}
+                assert set(fired) == due and len(fired) == len(due)
+                ticks = [model[key] for key in fired]
+                assert ticks == sorted(ticks)
+                for key in due:
+                    del model[key]
+            assert len(wheel) == len(model)
+
+    def test_clear(self):
+        """ Test that clear() removes every pending entry.
+        """
+        wheel = TimingWheel(start=0)
+        for key in range(10):
+            wheel.schedule(key, key * 100, key)
+        wheel.clear()
+        assert len(wheel) == 0 and wheel.advance(10 ** 6) == []
+
+    def test_long_gap_is_not_stepped(self):
+        """ Test that a jump of years re-places entries instead of visiting every tick.
+        """
+        wheel = TimingWheel(tick=1.0, start=0)
+        assert wheel.advance(10 ** 12) == [] and wheel.current == 10 ** 12
+        wheel.schedule('past', 10 ** 12 + 5, 'past')
+        wheel.schedule('future', 10 ** 13 + 30, 'future')
+        wheel.schedule('later', 10 ** 13 + 31, 'later')
+        assert wheel.advance(10 ** 13) == ['past']
+        assert wheel.advance(10 ** 13 + 30) == ['future'] and len(wheel) == 1
+
+
+class TestAlertScheduler:
+    """ Unit tests for AlertScheduler.
+    """
+    def test_due_alerts(self):
+        """ Test that alerts fire once, in time order, and can be re-armed or cancelled.
+        """
+        base = datetime(2026, 10, 19, 9, 0, 0)
+        alerts = AlertScheduler()
+        alerts.wheel = TimingWheel(start=base.timestamp())
+        alerts.schedule(1, (base + timedelta(minutes=5)).isoformat(), "later")
+        alerts.schedule(2, (base - timedelta(minutes=5)).isoformat(), "overdue")
+        alerts.schedule(3, (base + timedelta(minutes=1)).isoformat(), "sooner")
+        alerts.schedule(4, (base + timedelta(minutes=2)).isoformat(), "cancelled")
+        alerts.schedule(5, "not a date", "ignored")
+        alerts.cancel(4)
+
+        assert alerts.due(base.timestamp()) == [(2, "overdue")]
+        assert alerts.due((base + timedelta(minutes=10)).timestamp()) == [(3, "sooner"), (1, "later")]
+        assert alerts.due((base + timedelta(minutes=20)).timestamp()) == []
+
+        alerts.schedule(1, (base + timedelta(minutes=30)).isoformat(), "re-armed")
+        assert alerts.due((base + timedelta(minutes=31)).timestamp()) == [(1, "re-armed")]
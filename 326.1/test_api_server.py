@@ -0,0 +1,138 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from api_server import MAX_HEADER_BYTES, HTTPError, ScheduleAPI, ScheduleStore, load_token, parse_datetime
+
+TOKEN = "test-token"
+AUTH = b"Host: 127.0.0.1\r\nX-Schedule-Token: " + TOKEN.encode() + b"\r\n"
+
+
+def exchange(db_name, feed_dir, requests):
+    """Send raw requests to a server on an ephemeral port, one connection each, and return the raw responses."""
+    async def run():
+        api = ScheduleAPI(ScheduleStore(db_name, workers=2, feed_dir=feed_dir), token=TOKEN)
+        server = await asyncio.start_server(api.handle_connection, '127.0.0.1', 0, limit=MAX_HEADER_BYTES)
+        port = server.sockets[0].getsockname()[1]
+        responses = []
+        try:
+            for request in requests:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(request)
+                await writer.drain()
+                responses.append(await asyncio.wait_for(reader.read(), 5))
+                writer.close()
+        finally:
+            server.close()
+            await server.wait_closed()
+            await api.close()
+        return responses
+    return asyncio.run(run())
+
+
+def split(response):
+    head, _, body = response.partition(b'\r\n\r\n')
+    status_line, *lines = head.decode('latin-1').split('\r\n')
+    headers = {name.lower(): value.strip() for name, _, value in (line.partition(':') for line in lines)}
+    return int(status_line.split(' ')[1]), headers, body
+
+
+class TestParseDatetime:
+    """ Unit tests for date-time validation.
+    """
+    def test_naive_value_is_kept(self):
+        """ Test that naive values are normalised to seconds precision.
+        """
+        assert parse_datetime("2026-12-01T10:00", "end") == "2026-12-01T10:00:00"
+
+    def test_aware_value_becomes_local_time(self):
+        """ Test that an offset is converted to naive local time.
+        """
+        expected = datetime(2026, 12, 1, 5, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        assert parse_datetime("2026-12-01T10:00:00+05:00", "end") == expected.isoformat(timespec='seconds')
+
+    def test_invalid_value(self):
+        """ Test that invalid values raise a 400 error.
+        """
+        with pytest.raises(HTTPError) as exc_info:
+            parse_datetime("tomorrow", "end")
+        assert exc_info.value.status == 400
+
+
+class TestScheduleAPI:
+    """ Tests against a running server.
+    """
+    def test_negative_content_length(self, db, tmp_path):
+        """ Test that a negative Content-Length is answered with 400.
+        """
+        [response] = exchange(db.db_name, str(tmp_path / "feeds"),
+                              [b"POST /users/1/schedules HTTP/1.1\r\n" + AUTH + b"Content-Length: -5\r\n\r\n"])
+        assert split(response)[0] == 400
+
+    def test_create_and_delete(self, db, tmp_path):
+        """ Test creating a schedule, and that the 204 of a delete has no Content-Length.
+        """
+        body = json.dumps({'title': 'a', 'end_date_time': '2026-12-01T10:00:00',
+                           'alert_date_time': '2026-12-01T09:00:00'}).encode()
+        [created] = exchange(db.db_name, str(tmp_path / "feeds"), [
+            b"POST /users/1/schedules HTTP/1.1\r\n" + AUTH + b"Content-Type: application/json; charset=utf-8\r\n"
+            b"Connection: close\r\nContent-Length: %d\r\n\r\n" % len(body) + body
+        ])
+        status, _, payload = split(created)
+        assert status == 201
+        sid = json.loads(payload)['id']
+
+        [deleted, missing] = exchange(db.db_name, str(tmp_path / "feeds"), [
+            (b"DELETE /users/1/schedules/%d HTTP/1.1\r\n" % sid) + AUTH + b"Connection: close\r\n\r\n",
+            (b"DELETE /users/1/schedules/%d HTTP/1.1\r\n" % sid) + AUTH + b"Connection: close\r\n\r\n",
+        ])
+        status, headers, payload = split(deleted)
+        assert status == 204 and 'content-length' not in headers and payload == b''
+        assert split(missing)[0] == 404
+
+    def test_calendar_etag(self, db, add_schedule, tmp_path):
+        """ Test that the calendar feed answers 304 to a matching If-None-Match.
+        """
+        add_schedule(1, title="meeting")
+        first, = exchange(db.db_name, str(tmp_path / "feeds"),
+                          [b"GET /users/1/calendar.ics HTTP/1.1\r\n" + AUTH + b"Connection: close\r\n\r\n"])
+        status, headers, body = split(first)
+        assert status == 200 and headers['content-type'].startswith('text/calendar')
+        assert b'SUMMARY:meeting' in body
+        etag = headers['etag'].encode()
+
+        cached, changed = exchange(db.db_name, str(tmp_path / "feeds"), [
+            b"GET /users/1/calendar.ics HTTP/1.1\r\n" + AUTH +
+            b"If-None-Match: \"x\", %s\r\nConnection: close\r\n\r\n" % etag,
+            b"GET /users/1/calendar.ics?token=%s HTTP/1.1\r\nHost: localhost:8765\r\n"
+            b"If-None-Match: W/\"other\"\r\nConnection: close\r\n\r\n" % TOKEN.encode(),
+        ])
+        status, headers, body = split(cached)
+        assert status == 304 and body == b'' and headers['etag'] == etag.decode()
+        assert split(changed)[0] == 200
+
+    def test_rejects_unauthorised_requests(self, db, tmp_path):
+        """ Test that a missing token, a foreign Host, an Origin header or a non-JSON POST is refused.
+        """
+        responses = exchange(db.db_name, str(tmp_path / "feeds"), [
+            b"GET /users/1/schedules HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n",
+            b"GET /users/1/schedules?token=%s HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n"
+            % TOKEN.encode(),
+            b"GET /users/1/schedules HTTP/1.1\r\nHost: 127.0.0.1\r\nX-Schedule-Token: wrong\r\n"
+            b"Connection: close\r\n\r\n",
+            b"GET /users/1/schedules HTTP/1.1\r\nHost: evil.example:8765\r\nX-Schedule-Token: %s\r\n"
+            b"Connection: close\r\n\r\n" % TOKEN.encode(),
+            b"GET /users/1/schedules HTTP/1.1\r\n" + AUTH + b"Origin: http://localhost\r\nConnection: close\r\n\r\n",
+            b"POST /users/1/schedules HTTP/1.1\r\n" + AUTH +
+            b"Content-Type: text/plain\r\nConnection: close\r\nContent-Length: 2\r\n\r\n{}",
+            b"GET /users/1/schedules HTTP/1.1\r\n" + AUTH + b"Connection: close\r\n\r\n",
+        ])
+        assert [split(response)[0] for response in responses] == [401, 401, 401, 403, 403, 415, 200]
+
+    def test_load_token_is_stable(self, db):
+        """ Test that the token is created once and then read back from the file.
+        """
+        token = load_token(db.db_name)
+        assert len(token) >= 32 and load_token(db.db_name) == token
@@ -0,0 +1,62 @@
+from change_sync import Change, ChangeFeed, prune_changes
+
+
+class TestChangeFeed:
+    """ Unit tests for ChangeFeed and prune_changes.
+    """
+    def test_pull_collapses_changes_per_schedule(self, db, add_schedule):
+        """ Test that several changes of one schedule are reported once, with the last operation.
+        """
+        feed = ChangeFeed(db.connection.cursor())
+        kept = add_schedule(1)
+        gone = add_schedule(1)
+        db.connection.execute("UPDATE schedules SET title='x' WHERE id=?", (kept,))
+        db.connection.execute("DELETE FROM schedules WHERE id=?", (gone,))
+        db.connection.commit()
+
+        changes = feed.pull()
+        assert sorted(changes) == sorted([Change(kept, 1, 'update'), Change(gone, 1, 'delete')])
+        assert feed.pull() == []
+
+    def test_pull_in_batches(self, db, add_schedule):
+        """ Test that more changes than one batch are all returned.
+        """
+        feed = ChangeFeed(db.connection.cursor(), batch_size=3)
+        ids = [add_schedule(1) for _ in range(10)]
+        assert sorted(c.schedule_id for c in feed.pull()) == ids
+        assert feed.last_seq == feed.latest_seq()
+
+    def test_moving_schedule_reports_both_users(self, db, add_schedule):
+        """ Test that changing user_id removes the schedule from the old user.
+        """
+        sid = add_schedule(1)
+        feed = ChangeFeed(db.connection.cursor())
+        db.connection.execute("UPDATE schedules SET user_id=2 WHERE id=?", (sid,))
+        db.connection.commit()
+        assert sorted(feed.pull()) == sorted([Change(sid, 1, 'delete'), Change(sid, 2, 'update')])
+
+    def test_stale_after_prune(self, db, add_schedule):
+        """ Test that a feed behind a pruned range reports None once and then resumes.
+        """
+        add_schedule(1)
+        feed = ChangeFeed(db.connection.cursor(), last_seq=0)
+        add_schedule(1)
+        db.connection.execute("UPDATE schedule_changes SET changed_at=datetime('now', '-30 days')")
+        assert prune_changes(db.connection.cursor(), keep_days=7) == 2
+        db.connection.commit()
+
+        assert feed.is_stale()
+        assert feed.pull() is None
+        assert feed.last_seq == feed.latest_seq()
+        sid = add_schedule(1)
+        assert feed.pull() == [Change(sid, 1, 'insert')]
+
+    def test_prune_keeps_recent_entries(self, db, add_schedule):
+        """ Test that prune_changes only removes entries older than keep_days.
+        """
+        add_schedule(1)
+        db.connection.execute("UPDATE schedule_changes SET changed_at=datetime('now', '-30 days')")
+        add_schedule(1)
+        assert prune_changes(db.connection.cursor(), keep_days=7) == 1
+        remaining = db.connection.execute("SELECT COUNT(*) FROM schedule_changes").fetchone()[0]
+        assert remaining == 1
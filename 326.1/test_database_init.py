@@ -0,0 +1,156 @@
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from database_init import DatabaseInitializer
+from summary import load_summary
+
+EXPECTED_DAILY = """
+    SELECT user_id, substr(end_date_time, 1, 10),
+           SUM(CASE WHEN is_confirm THEN 0 ELSE 1 END), SUM(CASE WHEN is_confirm THEN 1 ELSE 0 END)
+    FROM schedules GROUP BY 1, 2
+"""
+EXPECTED_USERS = """
+    SELECT user_id, SUM(CASE WHEN is_confirm THEN 0 ELSE 1 END), SUM(CASE WHEN is_confirm THEN 1 ELSE 0 END)
+    FROM schedules GROUP BY 1
+"""
+
+
+def counters(conn):
+    """Return the counter tables without the rows that dropped to zero, next to the expected values."""
+    daily = conn.execute("SELECT user_id, day, unconfirmed, confirmed FROM schedule_daily_counts "
+                         "WHERE unconfirmed OR confirmed").fetchall()
+    users = conn.execute("SELECT user_id, unconfirmed, confirmed FROM schedule_user_counts "
+                         "WHERE unconfirmed OR confirmed").fetchall()
+    return ((sorted(daily), sorted(conn.execute(EXPECTED_DAILY).fetchall())),
+            (sorted(users), sorted(conn.execute(EXPECTED_USERS).fetchall())))
+
+
+def create_old_schema(path):
+    """Create a database with only the tables that existed before the change log and counters."""
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE schedules (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+        user_id INTEGER NOT NULL, end_date_time DATETIME NOT NULL, alert_date_time DATETIME NOT NULL,
+        is_confirm BOOLEAN DEFAULT 0, note TEXT, create_time DATETIME DEFAULT CURRENT_TIMESTAMP)""")
+    conn.executemany("INSERT INTO schedules (title, user_id, end_date_time, alert_date_time, is_confirm) "
+                     "VALUES ('t', ?, ?, ?, ?)",
+                     [(i % 3, f"2026-10-{1 + i % 5:02d}T10:00:00", "2026-10-01T09:00:00", i % 2)
+                      for i in range(40)])
+    conn.commit()
+    return conn
+
+
+class TestCounters:
+    """ Unit tests for the summary counter tables and triggers.
+    """
+    def test_triggers_follow_random_writes(self, db, add_schedule):
+        """ Test that the counters equal a GROUP BY over schedules after inserts, updates and deletes.
+        """
+        rng = random.Random(7)
+        ids = []
+        for _ in range(300):
+            op = rng.random()
+            if op < 0.5 or not ids:
+                ids.append(add_schedule(rng.randint(1, 3), f"2026-10-{rng.randint(1, 6):02d}T10:00:00",
+                                        confirmed=rng.randint(0, 1)))
+            elif op < 0.85:
+                db.connection.execute(
+                    "UPDATE schedules SET user_id=?, end_date_time=?, is_confirm=? WHERE id=?",
+                    (rng.randint(1, 3), f"2026-10-{rng.randint(1, 6):02d}T11:00:00", rng.randint(0, 1),
+                     rng.choice(ids)))
+            else:
+                db.connection.execute("DELETE FROM schedules WHERE id=?", (ids.pop(rng.randrange(len(ids))),))
+        db.connection.commit()
+        for actual, expected in counters(db.connection):
+            assert actual == expected
+
+    def test_backfill_of_existing_database(self, tmp_path):
+        """ Test that upgrading a database fills the counters from its schedules.
+        """
+        path = str(tmp_path / "old.db")
+        create_old_schema(path).close()
+        initializer = DatabaseInitializer(path)
+        initializer.create_tables()
+        for actual, expected in counters(initializer.connection):
+            assert actual == expected
+        initializer.close_connection()
+
+    def test_concurrent_upgrade_backfills_once(self, tmp_path):
+        """ Test that two initializers starting together on an old database do not both backfill.
+        """
+        path = str(tmp_path / "old.db")
+        holder = create_old_schema(path)
+        holder.isolation_level = None
+        holder.execute("BEGIN IMMEDIATE")
+        errors = []
+
+        def start():
+            initializer = DatabaseInitializer(path)
+            try:
+                initializer.create_counters(initializer.connect())
+                initializer.connection.commit()
+            except sqlite3.Error as e:
+                errors.append(e)
+            finally:
+                initializer.close_connection()
+
+        threads = [threading.Thread(target=start) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.3)
+        holder.execute("COMMIT")
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        for actual, expected in counters(holder):
+            assert actual == expected
+        holder.close()
+
+    def test_summary_overdue_matches_end_before_now(self, db, add_schedule):
+        """ Test that overdue counts unconfirmed schedules ending before now, including earlier today.
+        """
+        add_schedule(1, "2026-10-18T23:00:00")
+        add_schedule(1, "2026-10-19T08:00:00")
+        add_schedule(1, "2026-10-19T09:00:00", confirmed=1)
+        add_schedule(1, "2026-10-19T15:00:00")
+        add_schedule(1, "2026-10-19T17:00:00")
+        add_schedule(1, "2026-10-20T08:00:00")
+        add_schedule(2, "2026-10-19T08:00:00")
+        summary = load_summary(db.connection.cursor(), 1, datetime(2026, 10, 19, 12, 0))
+        assert summary['overdue'] == 2 and summary['due_today'] == 3 and summary['unconfirmed'] == 5
+        assert summary['next_change'] == "2026-10-19T15:00:00"
+        assert load_summary(db.connection.cursor(), 1, datetime(2026, 10, 19, 18, 0))['next_change'] is None
+
+
+class TestDatabaseInitializer:
+    """ Unit tests for connection settings.
+    """
+    def test_unknown_profile(self):
+        """ Test that an unknown profile is rejected.
+        """
+        with pytest.raises(ValueError):
+            DatabaseInitializer("x.db", "huge")
+
+    def test_journal_mode_from_environment(self, tmp_path, monkeypatch):
+        """ Test that SCHEDULE_DB_JOURNAL selects the journal mode and WAL is the default.
+        """
+        path = str(tmp_path / "j.db")
+        initializer = DatabaseInitializer(path)
+        initializer.create_tables()
+        assert initializer.connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        initializer.close_connection()
+
+        monkeypatch.setenv('SCHEDULE_DB_JOURNAL', 'delete')
+        initializer.create_tables()
+        assert initializer.connection.execute("PRAGMA journal_mode").fetchone()[0] == 'delete'
+        initializer.close_connection()
+
+        monkeypatch.setenv('SCHEDULE_DB_JOURNAL', 'memory')
+        with pytest.raises(ValueError):
+            initializer.create_tables()
+        initializer.close_connection()
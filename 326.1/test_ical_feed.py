@@ -0,0 +1,115 @@
+import json
+import os
+import re
+
+from change_sync import prune_changes
+from ical_feed import CalendarFeed, escape_text, fold
+
+
+def events(body):
+    """Return the VEVENTs of a feed without their build timestamps, keyed by UID."""
+    body = re.sub(rb'(DTSTAMP|LAST-MODIFIED):\S+\r\n', b'', body)
+    found = re.findall(rb'BEGIN:VEVENT\r\n.*?END:VEVENT\r\n', body, re.S)
+    return {re.search(rb'UID:(\S+)', event).group(1): event for event in found}
+
+
+class TestFormatting:
+    """ Unit tests for text escaping and line folding.
+    """
+    def test_escape_text(self):
+        """ Test that special characters and newlines are escaped.
+        """
+        assert escape_text('a,b;c\\d\r\ne\nf') == 'a\\,b\\;c\\\\d\\ne\\nf'
+        assert escape_text(None) == ''
+
+    def test_fold_keeps_lines_short_and_utf8_intact(self):
+        """ Test that folded lines stay within 75 octets without splitting characters.
+        """
+        line = "SUMMARY:" + "é" * 100
+        folded = fold(line)
+        parts = folded[:-2].split('\r\n')
+        assert all(len(part.encode('utf-8')) <= 75 for part in parts)
+        assert parts[0] + ''.join(part[1:] for part in parts[1:]) == line
+
+
+class TestCalendarFeed:
+    """ Unit tests for incremental CalendarFeed builds.
+    """
+    def build(self, db, tmp_path, out="feeds"):
+        feed = CalendarFeed(1, str(tmp_path / out))
+        return feed, feed.build(db.connection.cursor())
+
+    def test_incremental_build_matches_full_build(self, db, add_schedule, tmp_path):
+        """ Test that re-rendering changed events gives the same events as a fresh full build.
+        """
+        ids = [add_schedule(1, f"2026-10-{1 + i:02d}T10:00:00", title=f"Event {i}", note="n") for i in range(10)]
+        add_schedule(2, title="other user")
+        feed, (_, rendered) = self.build(db, tmp_path)
+        assert rendered == 10
+
+        db.connection.execute("UPDATE schedules SET title='renamed, again' WHERE id=?", (ids[0],))
+        db.connection.execute("UPDATE schedules SET is_confirm=1 WHERE id=?", (ids[1],))
+        db.connection.execute("DELETE FROM schedules WHERE id=?", (ids[2],))
+        db.connection.execute("UPDATE schedules SET user_id=2 WHERE id=?", (ids[3],))
+        add_schedule(1, title="new")
+        db.connection.commit()
+        assert feed.build(db.connection.cursor())[1] == 5
+
+        self.build(db, tmp_path, "full")
+        with open(feed.path, 'rb') as f:
+            incremental = events(f.read())
+        with open(str(tmp_path / "full" / "1.ics"), 'rb') as f:
+            full = events(f.read())
+        assert incremental == full
+        assert len(full) == 9
+        assert b'SUMMARY:renamed\\, again' in full[f'schedule-{ids[0]}-1@group-46'.encode()]
+        assert b'VALARM' not in full[f'schedule-{ids[1]}-1@group-46'.encode()]
+
+    def test_unchanged_feed_is_not_rewritten(self, db, add_schedule, tmp_path):
+        """ Test that a build without changes keeps the ETag and leaves the file alone.
+        """
+        add_schedule(1)
+        feed, (etag, _) = self.build(db, tmp_path)
+        os.utime(feed.path, (0, 0))
+        add_schedule(2)
+        assert feed.build(db.connection.cursor()) == (etag, 0)
+        assert os.path.getmtime(feed.path) == 0
+
+    def test_reload_from_sidecar(self, db, add_schedule, tmp_path):
+        """ Test that a new instance picks up the previous build and only renders new changes.
+        """
+        for i in range(5):
+            add_schedule(1, title=f"Event {i}")
+        feed, (etag, _) = self.build(db, tmp_path)
+
+        reloaded = CalendarFeed(1, str(tmp_path / "feeds"))
+        assert reloaded.etag == etag and reloaded.events == feed.events
+        add_schedule(1, title="one more")
+        assert reloaded.build(db.connection.cursor())[1] == 1
+
+    def test_mismatched_sidecar_forces_full_build(self, db, add_schedule, tmp_path):
+        """ Test that a sidecar not matching the feed file is ignored.
+        """
+        for i in range(3):
+            add_schedule(1)
+        feed, _ = self.build(db, tmp_path)
+        with open(feed.state_path, encoding='utf-8') as f:
+            state = json.load(f)
+        state['etag'] = '"stale"'
+        with open(feed.state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+        reloaded = CalendarFeed(1, str(tmp_path / "feeds"))
+        assert reloaded.seq is None
+        assert reloaded.build(db.connection.cursor())[1] == 3
+
+    def test_pruned_log_forces_full_build(self, db, add_schedule, tmp_path):
+        """ Test that a feed behind a pruned change log is rendered from scratch.
+        """
+        add_schedule(1)
+        feed, _ = self.build(db, tmp_path)
+        add_schedule(1)
+        db.connection.execute("UPDATE schedule_changes SET changed_at=datetime('now', '-30 days')")
+        prune_changes(db.connection.cursor(), keep_days=7)
+        db.connection.commit()
+        assert feed.build(db.connection.cursor())[1] == 2
@@ -0,0 +1,64 @@
+import sqlite3
+import time
+
+from instrumentation import Instrumentation
+
+
+def slow_connection(rows=40):
+    """Return a connection whose slow(x) function takes 2 ms per row."""
+    conn = sqlite3.connect(":memory:")
+    conn.create_function("slow", 1, lambda value: time.sleep(0.002) or value)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(rows)])
+    return conn
+
+
+class TestInstrumentedCursor:
+    """ Unit tests for statement timing and the slow query log.
+    """
+    def test_slow_fetch_is_logged(self):
+        """ Test that a statement whose time is spent fetching rows is logged with its plan.
+        """
+        metrics = Instrumentation(enabled=True, slow_query_seconds=0.05)
+        cursor = metrics.wrap_cursor(slow_connection().cursor())
+        cursor.execute("SELECT slow(x) FROM t")
+        assert not metrics.slow_queries
+        assert len(cursor.fetchall()) == 40
+
+        [entry] = metrics.slow_queries
+        assert entry['sql'] == "SELECT slow(x) FROM t"
+        assert entry['seconds'] >= 0.05
+        assert entry['plan'] == ["SCAN t"]
+        data = metrics.snapshot()['metrics']
+        assert data["sql: SELECT slow(x) FROM t [fetch]"]['rows'] == 40
+
+    def test_fetchmany_logs_when_exhausted(self):
+        """ Test that a statement read in batches is logged once, after its last batch.
+        """
+        metrics = Instrumentation(enabled=True, slow_query_seconds=0.05)
+        cursor = metrics.wrap_cursor(slow_connection().cursor())
+        cursor.execute("SELECT slow(x) FROM t")
+        while cursor.fetchmany(15):
+            pass
+        assert len(metrics.slow_queries) == 1
+
+    def test_fast_statements_are_not_logged(self):
+        """ Test that statements below the threshold are only timed.
+        """
+        metrics = Instrumentation(enabled=True, slow_query_seconds=0.05)
+        cursor = metrics.wrap_cursor(slow_connection(rows=2).cursor())
+        cursor.execute("SELECT slow(x) FROM t")
+        cursor.fetchone()
+        cursor.execute("SELECT COUNT(*) FROM t")
+        assert cursor.fetchone() == (2,)
+        assert not metrics.slow_queries
+        assert metrics.snapshot()['metrics']["sql: SELECT COUNT(*) FROM t"]['count'] == 1
+
+    def test_disabled(self):
+        """ Test that a disabled instance records nothing.
+        """
+        metrics = Instrumentation(enabled=False, slow_query_seconds=0)
+        cursor = metrics.wrap_cursor(slow_connection(rows=2).cursor())
+        cursor.execute("SELECT slow(x) FROM t")
+        cursor.fetchall()
+        assert metrics.snapshot()['metrics'] == {} and not metrics.slow_queries
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import time
+
+import pytest
+
+from maintenance import MaintenanceService
+
+
+class TestMaintenanceService:
+    """ Unit tests for the maintenance tasks.
+    """
+    def test_compact_frees_and_reports_every_page(self, db, tmp_path):
+        """ Test that compact() returns all free pages and reports the number it freed.
+        """
+        db.connection.executemany(
+            "INSERT INTO schedules (title, user_id, end_date_time, alert_date_time, note) VALUES ('t', 1, ?, ?, ?)",
+            [("2026-10-01T10:00:00", "2026-10-01T09:00:00", "x" * 500)] * 2000
+        )
+        db.connection.commit()
+        db.connection.execute("DELETE FROM schedules")
+        db.connection.commit()
+        free = db.connection.execute("PRAGMA freelist_count").fetchone()[0]
+        assert free > 0
+
+        service = MaintenanceService(db.db_name, backup_dir=str(tmp_path / "backups"), idle_seconds=0,
+                                     vacuum_pages=64)
+        result = service.compact()
+        service.db.close_connection()
+        assert result['freed_pages'] == free
+        assert db.connection.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+    def test_backup_rotation_and_integrity(self, db, add_schedule, tmp_path):
+        """ Test that backups are complete copies and only keep_backups snapshots remain.
+        """
+        add_schedule(1)
+        backup_dir = str(tmp_path / "backups")
+        service = MaintenanceService(db.db_name, backup_dir=backup_dir, keep_backups=2, idle_seconds=0)
+        for i in range(3):
+            os.rename(service.backup(), os.path.join(backup_dir, f"schedules-2026010{i}-000000.db"))
+        assert sorted(os.listdir(backup_dir)) == ["schedules-20260101-000000.db", "schedules-20260102-000000.db"]
+        assert service.check_integrity() == ['ok']
+        service.db.close_connection()
+
+    def test_backup_due_from_newest_snapshot(self, db, tmp_path):
+        """ Test that a recent snapshot on disk delays the next backup instead of one per launch.
+        """
+        backup_dir = tmp_path / "backups"
+        backup_dir.mkdir()
+        recent = backup_dir / "schedules-20260101-000000.db"
+        recent.write_bytes(b"")
+        service = MaintenanceService(db.db_name, backup_dir=str(backup_dir), idle_seconds=0)
+        service.tasks = [task for task in service.tasks if task[0] == 'backup']
+        service.run_due_tasks()
+        assert 'backup' not in service.status
+
+        old = time.time() - 2 * 24 * 60 * 60
+        os.utime(recent, (old, old))
+        service = MaintenanceService(db.db_name, backup_dir=str(backup_dir), idle_seconds=0)
+        service.tasks = [task for task in service.tasks if task[0] == 'backup']
+        service.run_due_tasks()
+        assert len(os.listdir(backup_dir)) == 2 and 'result' in service.status['backup']
+        service.db.close_connection()
+
+    def test_failed_backup_removes_partial_file(self, db, tmp_path, monkeypatch):
+        """ Test that a backup failing midway leaves no .part file behind.
+        """
+        backup_dir = tmp_path / "backups"
+        service = MaintenanceService(db.db_name, backup_dir=str(backup_dir), idle_seconds=0)
+
+        class FailingConnection:
+            def backup(self, dst, **kwargs):
+                dst.execute("CREATE TABLE partial (x)")
+                raise sqlite3.OperationalError("disk I/O error")
+
+        monkeypatch.setattr(service, 'connection', FailingConnection)
+        with pytest.raises(sqlite3.OperationalError):
+            service.backup()
+        assert os.listdir(backup_dir) == []
@@ -0,0 +1,124 @@
+from change_sync import ChangeFeed
+from database_init import DatabaseInitializer
+from schedule_cache import SELECT_COLUMNS, ScheduleCache, record_size
+
+
+def sql_search(conn, uid, kw, df, dt):
+    return conn.execute(
+        f"SELECT {SELECT_COLUMNS} FROM schedules WHERE user_id=? AND (title LIKE ? OR note LIKE ?) "
+        "AND end_date_time BETWEEN ? AND ? ORDER BY end_date_time, id",
+        (uid, f'%{kw}%', f'%{kw}%', df, dt)
+    ).fetchall()
+
+
+class TestScheduleCache:
+    """ Unit tests for ScheduleCache.
+    """
+    def test_search_matches_sql(self, db, add_schedule):
+        """ Test that cached searches return the rows the SQL filter returns, in end time order.
+        """
+        for i in range(60):
+            add_schedule(1, f"2026-10-{1 + i % 28:02d}T{i % 24:02d}:00:00", title=f"Title {i}",
+                         note="Lunch" if i % 3 else "")
+        add_schedule(2, "2026-10-05T10:00:00", title="Title other user")
+        cache = ScheduleCache(db.connection.cursor())
+        for kw, df, dt in [("", "2026-10-01T00:00:00", "2026-10-31T23:59:59"),
+                           ("title 1", "2026-10-01T00:00:00", "2026-10-31T23:59:59"),
+                           ("lunch", "2026-10-05T00:00:00", "2026-10-12T23:59:59"),
+                           ("", "2026-10-03T05:00:00", "2026-10-03T05:00:00")]:
+            assert cache.search(1, kw, df, dt) == sql_search(db.connection, 1, kw, df, dt)
+        assert list(cache.users) == [1]
+
+    def test_like_wildcards_fall_back_to_sql(self, db, add_schedule):
+        """ Test that keywords with LIKE wildcards behave exactly like the SQL filter.
+        """
+        add_schedule(1, title="50% done")
+        add_schedule(1, title="500 done")
+        cache = ScheduleCache(db.connection.cursor())
+        args = ("0%", "2026-01-01T00:00:00", "2026-12-31T00:00:00")
+        assert cache.search(1, *args) == sql_search(db.connection, 1, *args)
+
+    def test_refresh_and_discard_track_local_writes(self, db, add_schedule):
+        """ Test that refresh() and discard() keep the cached rows and the size total current.
+        """
+        first = add_schedule(1, "2026-10-02T10:00:00")
+        second = add_schedule(1, "2026-10-03T10:00:00")
+        cache = ScheduleCache(db.connection.cursor())
+        assert len(cache.rows(1)) == 2
+
+        db.connection.execute("UPDATE schedules SET end_date_time='2026-10-04T10:00:00', title='moved' WHERE id=?",
+                              (first,))
+        third = add_schedule(1, "2026-10-01T10:00:00")
+        cache.refresh(1, first, third)
+        assert [row[0] for row in cache.rows(1)] == [third, second, first]
+        assert cache.get(1, first).title == 'moved'
+
+        db.connection.execute("DELETE FROM schedules WHERE id=?", (second,))
+        cache.discard(1, second)
+        assert [row[0] for row in cache.rows(1)] == [third, first]
+        assert cache.size == sum(record_size(row) for row in cache.rows(1))
+
+    def test_evicts_least_recently_used_user(self, db, add_schedule):
+        """ Test that users are evicted in LRU order once the memory budget is exceeded.
+        """
+        for uid in (1, 2, 3):
+            for _ in range(10):
+                add_schedule(uid)
+        one_user = sum(record_size(row) for row in db.connection.execute(
+            f"SELECT {SELECT_COLUMNS} FROM schedules WHERE user_id=1"))
+        cache = ScheduleCache(db.connection.cursor(), max_bytes=one_user * 2)
+        cache.rows(1)
+        cache.rows(2)
+        cache.rows(1)
+        cache.rows(3)
+        assert list(cache.users) == [1, 3]
+        assert cache.size == 2 * one_user
+
+    def test_oversized_user_is_served_from_sql(self, db, add_schedule):
+        """ Test that a user larger than the whole budget is never cached but still answered.
+        """
+        for i in range(5):
+            add_schedule(1, title=f"big {i}")
+        cache = ScheduleCache(db.connection.cursor(), max_bytes=100)
+        assert len(cache.rows(1)) == 5
+        assert cache.get(1, 1).title == "big 0"
+        assert 1 in cache.oversized and not cache.users
+
+    def test_applies_commits_of_other_connections(self, db, add_schedule):
+        """ Test that another connection's commits are applied from the change feed.
+        """
+        kept = add_schedule(1, title="old")
+        cursor = db.connection.cursor()
+        cache = ScheduleCache(cursor, change_feed=ChangeFeed(cursor))
+        cache.rows(1)
+        cache.take_changes()
+
+        other = DatabaseInitializer(db.db_name).open_connection()
+        other.execute("UPDATE schedules SET title='new' WHERE id=?", (kept,))
+        added = other.execute(
+            "INSERT INTO schedules (title, user_id, end_date_time, alert_date_time) VALUES ('added', 1, ?, ?)",
+            ("2026-10-09T10:00:00", "2026-10-09T09:00:00")
+        ).lastrowid
+        other.commit()
+        other.close()
+
+        assert [row[1] for row in cache.rows(1)] == ["new", "added"]
+        assert sorted(c.schedule_id for c in cache.take_changes()) == [kept, added]
+
+    def test_stale_feed_drops_the_cache(self, db, add_schedule):
+        """ Test that a change feed behind a pruned log clears the cache and reports None.
+        """
+        add_schedule(1)
+        cursor = db.connection.cursor()
+        cache = ScheduleCache(cursor, change_feed=ChangeFeed(cursor))
+        cache.rows(1)
+
+        other = DatabaseInitializer(db.db_name).open_connection()
+        other.execute("INSERT INTO schedules (title, user_id, end_date_time, alert_date_time) VALUES ('x', 1, ?, ?)",
+                      ("2026-10-09T10:00:00", "2026-10-09T09:00:00"))
+        other.execute("DELETE FROM schedule_changes")
+        other.commit()
+        other.close()
+
+        assert len(cache.rows(1)) == 2
+        assert cache.take_changes() is None
@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+
+import pytest
+
+from instrumentation import metrics
+from write_queue import WriteQueue, WriteResult, get_write_queue
+
+
+@pytest.fixture
+def writer(db):
+    """A running WriteQueue on the test database, closed after the test."""
+    queue = WriteQueue(db.db_name)
+    queue.start()
+    yield queue
+    if queue.is_alive():
+        queue.close()
+
+
+def insert(title):
+    def job(cursor):
+        cursor.execute("INSERT INTO schedules (title, user_id, end_date_time, alert_date_time) VALUES (?, 1, ?, ?)",
+                       (title, "2026-10-01T10:00:00", "2026-10-01T09:00:00"))
+        return cursor.lastrowid
+    return job
+
+
+class TestWriteQueue:
+    """ Unit tests for the single writer thread.
+    """
+    def test_execute_returns_write_result(self, db, writer):
+        """ Test that execute() resolves to the statement's lastrowid and rowcount.
+        """
+        result = writer.execute("INSERT INTO schedules (title, user_id, end_date_time, alert_date_time) "
+                                "VALUES ('a', 1, '2026-10-01T10:00:00', '2026-10-01T09:00:00')").result(5)
+        assert isinstance(result, WriteResult) and result.rowcount == 1
+        title = db.connection.execute("SELECT title FROM schedules WHERE id=?", (result.lastrowid,)).fetchone()
+        assert title == ('a',)
+
+    def test_failing_job_does_not_undo_its_batch(self, db, writer):
+        """ Test that a job raising inside a group commit is rolled back alone.
+        """
+        release = threading.Event()
+        blocker = writer.submit(lambda cursor: release.wait(5))
+
+        def failing(cursor):
+            insert("rolled back")(cursor)
+            raise ValueError("job failed")
+
+        futures = [writer.submit(insert("before")), writer.submit(failing), writer.submit(insert("after"))]
+        release.set()
+        blocker.result(5)
+
+        assert futures[0].result(5) and futures[2].result(5)
+        with pytest.raises(ValueError):
+            futures[1].result(5)
+        titles = [row[0] for row in db.connection.execute("SELECT title FROM schedules ORDER BY id")]
+        assert titles == ["before", "after"]
+
+    def test_sqlite_error_in_job(self, writer):
+        """ Test that an SQL error is raised from the job's future only.
+        """
+        bad = writer.execute("INSERT INTO missing_table VALUES (1)")
+        good = writer.submit(insert("ok"))
+        with pytest.raises(sqlite3.OperationalError):
+            bad.result(5)
+        assert good.result(5)
+
+    def test_close_finishes_queued_jobs(self, db, writer):
+        """ Test that close() runs everything queued before it and stops the thread.
+        """
+        futures = [writer.submit(insert(f"t{i}")) for i in range(50)]
+        writer.close()
+        assert all(future.done() for future in futures)
+        assert not writer.is_alive()
+        assert db.connection.execute("SELECT COUNT(*) FROM schedules").fetchone()[0] == 50
+
+    def test_job_statements_are_instrumented(self, writer, monkeypatch):
+        """ Test that statements run by jobs are timed and checked against the slow query threshold.
+        """
+        monkeypatch.setattr(metrics, 'enabled', True)
+        monkeypatch.setattr(metrics, 'slow_query_seconds', 0)
+        metrics.reset()
+        try:
+            writer.submit(insert("timed")).result(5)
+            names = metrics.snapshot()['metrics']
+            assert any(name.startswith("sql: INSERT INTO schedules") for name in names)
+            assert any(entry['sql'].startswith("INSERT INTO schedules") for entry in metrics.slow_queries)
+        finally:
+            metrics.reset()
+
+    def test_get_write_queue_rejects_other_profile(self, db):
+        """ Test that asking for a running writer with a different profile raises instead of ignoring it.
+        """
+        writer = get_write_queue(db.db_name, "low_memory")
+        try:
+            assert get_write_queue(db.db_name, "low_memory") is writer
+            with pytest.raises(ValueError):
+                get_write_queue(db.db_name, "performance")
+        finally:
+            writer.close()
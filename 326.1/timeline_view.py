@@ -0,0 +1,171 @@
+"""
+timeline_view.py
+
+This module provides a calendar-style timeline of a user's schedules. Each
+row of the view is one week and each cell one day showing how many schedules
+end on that day.
+
+Only the cells inside the viewport are painted. Per-day counts come from the
+schedule_daily_counts table maintained by triggers (see
+DatabaseInitializer.create_counters) and are fetched one month at a time, so
+scrolling costs the same whether an account has a hundred entries or half a
+million. Individual schedules are never loaded here; double-clicking a day
+emits day_activated so the caller can show that day's items.
+"""
+
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from PyQt5.QtCore import QDate, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtWidgets import QAbstractScrollArea
+
+FIRST_WEEK = date(1970, 1, 5)  # a Monday
+LAST_WEEK = date(2100, 12, 27)
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+HEADER_HEIGHT = 24
+
+
+class DayBuckets:
+    """Per-day schedule counts of one user, loaded and cached by month."""
+
+    def __init__(self, cursor, uid, max_months=60):
+        self.cursor = cursor
+        self.uid = uid
+        self.max_months = max_months
+        self.months = OrderedDict()
+
+    def invalidate(self):
+        """Forget all loaded months."""
+        self.months.clear()
+
+    def month(self, year, month):
+        """Return {day: (unconfirmed, confirmed)} for one month, loading it on a miss."""
+        key = (year, month)
+        counts = self.months.get(key)
+        if counts is not None:
+            self.months.move_to_end(key)
+            return counts
+        prefix = f"{year:04d}-{month:02d}"
+        self.cursor.execute(
+            "SELECT day, unconfirmed, confirmed FROM schedule_daily_counts "
+            "WHERE user_id=? AND day BETWEEN ? AND ?",
+            (self.uid, prefix + "-01", prefix + "-31")
+        )
+        counts = self.months[key] = {
+            day: (unconfirmed, confirmed) for day, unconfirmed, confirmed in self.cursor.fetchall()
+            if unconfirmed or confirmed
+        }
+        while len(self.months) > self.max_months:
+            self.months.popitem(last=False)
+        return counts
+
+    def get(self, day):
+        """Return (unconfirmed, confirmed) for a date."""
+        return self.month(day.year, day.month).get(day.isoformat(), (0, 0))
+
+
+class TimelineView(QAbstractScrollArea):
+    """Scrollable week-per-row calendar that paints only the visible days."""
+
+    day_activated = pyqtSignal(QDate)
+
+    def __init__(self, cursor, uid, parent=None):
+        """Create the view scrolled to the current week."""
+        super().__init__(parent)
+        self.buckets = DayBuckets(cursor, uid)
+        self.week_count = (LAST_WEEK - FIRST_WEEK).days // 7 + 1
+        self.rows_visible = 6
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.scroll_to(date.today())
+
+    def set_mode(self, mode):
+        """Show about a month ('month') or a single week ('week') per screen."""
+        first = self.week_at(0)
+        self.rows_visible = 1 if mode == 'week' else 6
+        self._update_scrollbar()
+        self.scroll_to(first)
+        self.viewport().update()
+
+    def invalidate(self):
+        """Reload the counts after schedules changed."""
+        self.buckets.invalidate()
+        self.viewport().update()
+
+    def row_height(self):
+        """Height in pixels of one week row."""
+        return max(40, (self.viewport().height() - HEADER_HEIGHT) // self.rows_visible)
+
+    def week_at(self, y):
+        """Return the Monday of the week row drawn at viewport coordinate y."""
+        index = (self.verticalScrollBar().value() + max(0, y - HEADER_HEIGHT)) // self.row_height()
+        return FIRST_WEEK + timedelta(weeks=min(index, self.week_count - 1))
+
+    def scroll_to(self, day):
+        """Scroll so the week containing day is the first visible row."""
+        self._update_scrollbar()
+        self.verticalScrollBar().setValue((day - FIRST_WEEK).days // 7 * self.row_height())
+
+    def _update_scrollbar(self):
+        row_h = self.row_height()
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, self.week_count * row_h - (self.viewport().height() - HEADER_HEIGHT)))
+        bar.setSingleStep(row_h // 4)
+        bar.setPageStep(row_h * self.rows_visible)
+
+    def resizeEvent(self, event):
+        """Keep the first visible week in place when the view is resized."""
+        first = self.week_at(0)
+        super().resizeEvent(event)
+        self.scroll_to(first)
+
+    def paintEvent(self, event):
+        """Paint the weekday header and the week rows intersecting the viewport."""
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        width = self.viewport().width()
+        col_w = width / 7
+        row_h = self.row_height()
+        offset = self.verticalScrollBar().value()
+        first = offset // row_h
+        last = min(self.week_count - 1, (offset + self.viewport().height()) // row_h)
+        today = date.today()
+        text_color = palette.text().color()
+        grid_color = palette.mid().color()
+        highlight = palette.highlight().color()
+
+        for index in range(first, last + 1):
+            top = HEADER_HEIGHT + index * row_h - offset
+            monday = FIRST_WEEK + timedelta(weeks=index)
+            for col in range(7):
+                day = monday + timedelta(days=col)
+                rect = QRect(int(col * col_w), top, int((col + 1) * col_w) - int(col * col_w), row_h)
+                unconfirmed, confirmed = self.buckets.get(day)
+                total = unconfirmed + confirmed
+                if total:
+                    shade = QColor(highlight)
+                    shade.setAlpha(min(200, 40 + 20 * total))
+                    painter.fillRect(rect, shade)
+                painter.setPen(grid_color)
+                painter.drawRect(rect)
+                painter.setPen(highlight if day == today else text_color)
+                label = day.strftime("%b %d, %Y") if day.day == 1 or (index == first and col == 0) else str(day.day)
+                painter.drawText(rect.adjusted(4, 2, -4, -2), Qt.AlignLeft | Qt.AlignTop, label)
+                if total:
+                    painter.setPen(text_color)
+                    painter.drawText(rect.adjusted(4, 2, -4, -4), Qt.AlignLeft | Qt.AlignBottom,
+                                     f"{unconfirmed} open / {confirmed} done")
+
+        header = QRect(0, 0, width, HEADER_HEIGHT)
+        painter.fillRect(header, palette.button())
+        painter.setPen(palette.buttonText().color())
+        for col, name in enumerate(WEEKDAYS):
+            painter.drawText(QRect(int(col * col_w), 0, int(col_w), HEADER_HEIGHT), Qt.AlignCenter, name)
+
+    def mouseDoubleClickEvent(self, event):
+        """Emit day_activated for the double-clicked day."""
+        if event.pos().y() < HEADER_HEIGHT:
+            return
+        col = min(6, int(event.pos().x() / (self.viewport().width() / 7)))
+        day = self.week_at(event.pos().y()) + timedelta(days=col)
+        self.day_activated.emit(QDate(day.year, day.month, day.day))
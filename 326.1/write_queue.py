@@ -0,0 +1,128 @@
+"""
+write_queue.py
+
+This module funnels every write to schedules.db in a process through one
+writer thread, so connections of the same process never compete for the
+database lock.
+
+Callers submit jobs and get a concurrent.futures.Future back. The writer
+drains whatever jobs are queued, runs them in a single BEGIN IMMEDIATE
+transaction (group commit) with a savepoint around each one so a failing job
+does not undo its neighbours, and resolves the futures once the transaction
+has committed. Together with WAL mode, readers keep running while the writer
+commits, and the busy timeout makes writers of other processes wait for the
+lock instead of failing with "database is locked".
+"""
+
+import queue
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+
+from database_init import DatabaseInitializer
+from instrumentation import metrics
+
+WriteResult = namedtuple('WriteResult', ['lastrowid', 'rowcount'])
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_write_queue(db_name="schedules.db", profile="default"):
+    """
+    Return the running WriteQueue of this process for a database, starting it on first use.
+    Raises ValueError if the running writer was opened with a different profile.
+    """
+    with _writers_lock:
+        writer = _writers.get(db_name)
+        if writer is None or not writer.is_alive():
+            writer = _writers[db_name] = WriteQueue(db_name, profile)
+            writer.start()
+        elif writer.db.profile != profile:
+            raise ValueError(f"Writer for {db_name} already runs with profile {writer.db.profile}, not {profile}")
+        return writer
+
+
+class WriteQueue(threading.Thread):
+    """Single writer thread executing submitted jobs with group commit."""
+
+    def __init__(self, db_name="schedules.db", profile="default", max_batch=256):
+        super().__init__(name="schedule-writer", daemon=True)
+        self.db = DatabaseInitializer(db_name, profile)
+        self.max_batch = max_batch
+        self.jobs = queue.Queue()
+
+    def submit(self, fn):
+        """Queue fn(cursor) to run inside the next write transaction and return a Future of its result."""
+        future = Future()
+        self.jobs.put((fn, future))
+        return future
+
+    def execute(self, sql, params=()):
+        """Queue one statement and return a Future of its WriteResult."""
+        def job(cursor):
+            cursor.execute(sql, params)
+            return WriteResult(cursor.lastrowid, cursor.rowcount)
+        return self.submit(job)
+
+    def close(self):
+        """Finish the queued jobs and stop the thread."""
+        self.jobs.put(None)
+        self.join()
+
+    def run(self):
+        """Drain the queue in batches, committing each batch as one transaction."""
+        conn = self.db.open_connection()
+        conn.isolation_level = None
+        cursor = metrics.wrap_cursor(conn.cursor())
+        running = True
+        while running:
+            batch = [self.jobs.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [job for job in batch if job is not None]
+            if batch:
+                with metrics.timed("writer.commit") as timer:
+                    timer.rows = len(batch)
+                    self._commit(cursor, batch)
+        conn.close()
+
+    def _commit(self, cursor, batch):
+        """Run one batch of jobs in a transaction and resolve their futures."""
+        outcomes = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for fn, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    outcomes.append(None)
+                    continue
+                cursor.execute("SAVEPOINT job")
+                try:
+                    outcomes.append((True, fn(cursor)))
+                    cursor.execute("RELEASE job")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO job")
+                    cursor.execute("RELEASE job")
+                    outcomes.append((False, e))
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            if cursor.connection.in_transaction:
+                cursor.execute("ROLLBACK")
+            for fn, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (fn, future), outcome in zip(batch, outcomes):
+            if outcome is None:
+                continue
+            ok, value = outcome
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)